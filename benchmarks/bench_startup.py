@@ -0,0 +1,75 @@
+"""Report how long the app modules take to import, and what the pool would add.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [runs]
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+"import main" is the cold start before the login page can render; "eager
+pool" is the cost the old import-time SimpleConnectionPool(minconn=5) paid,
+measured here by prefilling the lazy pool right after import.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_MAIN = """
+import time
+started = time.perf_counter()
+import main
+import database
+print(time.perf_counter() - started, database.pool is None)
+"""
+
+EAGER_POOL = """
+import time
+started = time.perf_counter()
+import main
+import database
+database.get_pool().prefill()
+print(time.perf_counter() - started, database.pool is None)
+"""
+
+def measure(code, runs):
+    """
+    Run code in fresh interpreters and return the timings and pool state,
+    or raise RuntimeError with the last line of the child's error
+    """
+    timings = []
+    lazy = True
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"exit status {result.returncode}")
+        output = result.stdout.split()
+        timings.append(float(output[-2]))
+        lazy = lazy and output[-1] == 'True'
+    return timings, lazy
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    lazy_timings, pool_deferred = measure(IMPORT_MAIN, runs)
+    lazy = statistics.median(lazy_timings)
+    print(f"runs: {runs}")
+    print(f"import main (lazy pool):  {lazy:.3f}s median, pool created: {not pool_deferred}")
+
+    try:
+        eager_timings, _ = measure(EAGER_POOL, runs)
+    except RuntimeError as e:
+        # The connects need the database; the lazy figure above stands alone
+        print(f"import main + 5 connects: not measured, database unreachable ({e})")
+        return
+    eager = statistics.median(eager_timings)
+    print(f"import main + 5 connects: {eager:.3f}s median")
+    print(f"saved before first paint: {eager - lazy:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the per-date Tokopedia loop with the grouped summarizer.
+
+Run from the repository root:
+
+    python benchmarks/bench_tokopedia.py [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers import (
+    TOKOPEDIA_FREE_SHIPPING_FEE,
+    TOKOPEDIA_SERVICE_FEE,
+    summarize_tokopedia_commissions
+)
+
+def make_commission_report(rows, days=92, seed=0):
+    """Build a synthetic Commission Report sheet"""
+    rng = np.random.default_rng(seed)
+    names = np.array([
+        TOKOPEDIA_SERVICE_FEE,
+        TOKOPEDIA_FREE_SHIPPING_FEE,
+        'Biaya Layanan Lainnya'
+    ])
+    start = pd.Timestamp('2024-01-01')
+    finish = start + pd.to_timedelta(rng.integers(0, days, rows), unit='D')
+    return pd.DataFrame({
+        'Invoice': [f'INV/{i:08d}' for i in range(rows)],
+        'Commission Name': names[rng.integers(0, len(names), rows)],
+        'Finish Date': finish.strftime('%Y-%m-%d %H:%M:%S'),
+        'Total Product Amount': rng.integers(10_000, 2_000_000, rows),
+        'Service Fee Gross': rng.integers(500, 50_000, rows)
+    })
+
+def legacy_summarize(df):
+    """Per-date filter loop the grouped summarizer replaced"""
+    df1 = df[df['Commission Name'] == TOKOPEDIA_SERVICE_FEE].copy()
+    df2 = df[df['Commission Name'] == TOKOPEDIA_FREE_SHIPPING_FEE].copy()
+
+    df1['Finish Date'] = pd.to_datetime(df1['Finish Date']).dt.date
+    df2['Finish Date'] = pd.to_datetime(df2['Finish Date']).dt.date
+
+    df1['Total Product Amount'] = pd.to_numeric(df1['Total Product Amount'], errors='coerce')
+    df1['Service Fee Gross'] = pd.to_numeric(df1['Service Fee Gross'], errors='coerce')
+    df2['Service Fee Gross'] = pd.to_numeric(df2['Service Fee Gross'], errors='coerce')
+
+    summary_data = []
+    dates = sorted(set(df1['Finish Date'].unique()) | set(df2['Finish Date'].unique()))
+    for date in dates:
+        gross = df1[df1['Finish Date'] == date]['Total Product Amount'].sum()
+        fee1 = df1[df1['Finish Date'] == date]['Service Fee Gross'].sum()
+        fee2 = df2[df2['Finish Date'] == date]['Service Fee Gross'].sum()
+        summary_data.append({'Date': date, 'Net_income': gross - fee1 - fee2})
+    return pd.DataFrame(summary_data)
+
+def best_of(func, df, repeat=3):
+    """Return the fastest run time and the last result"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(df)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = make_commission_report(rows)
+
+    legacy_time, legacy = best_of(legacy_summarize, df)
+    grouped_time, grouped = best_of(summarize_tokopedia_commissions, df)
+
+    pd.testing.assert_frame_equal(
+        legacy.astype({'Net_income': float}),
+        grouped.astype({'Net_income': float})
+    )
+
+    print(f"rows: {rows:,}  dates: {len(grouped)}")
+    print(f"per-date loop: {legacy_time:.3f}s")
+    print(f"grouped:       {grouped_time:.3f}s")
+    print(f"speedup:       {legacy_time / grouped_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
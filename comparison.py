@@ -0,0 +1,131 @@
+"""Period comparisons of a metric, per store account or in total.
+
+Every comparison table in the reports is the same computation: sum a metric
+over two periods, then add the difference and the percent change. The sums
+come from the rollups in one query with a SUM() FILTER column per period,
+and the differences are computed on whole NumPy columns.
+"""
+import numpy as np
+import pandas as pd
+from database import get_db_cursor
+from periods import period_predicate
+from report_cache import cached_report
+from report_frames import PERCENT, ReportFrame, metric_kind
+
+# Grouping name to the SQL expression rows are grouped by
+GROUPINGS = {
+    'account': 'store_account_id',
+}
+
+PERIOD_TOTALS_SQL = """
+    SELECT {group} AS "Accounts",
+        {columns}
+    FROM {table}
+    WHERE username = %s
+    AND metric = %s
+    AND ({ranges})
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+def is_month_aligned(period):
+    """True when the period starts and ends on the first of a month"""
+    return period.start.day == 1 and period.end.day == 1
+
+def rollup_source(periods):
+    """Monthly rollup when every period is whole months, the daily rollup otherwise"""
+    if all(is_month_aligned(period) for period in periods):
+        return 'report_monthly_rollup', 'month'
+    return 'report_daily_rollup', 'day'
+
+def period_totals_query(username, metric, periods, grouping='account'):
+    """Query and params summing metric over each period, one column period_<n> per period"""
+    table, column = rollup_source(periods)
+    predicate = period_predicate(column)
+    columns = ',\n        '.join(
+        f"COALESCE(SUM(total) FILTER (WHERE {predicate}), 0)::float AS period_{index}"
+        for index in range(len(periods))
+    )
+    ranges = ' OR '.join(f"({predicate})" for _ in periods)
+    bounds = [bound for period in periods for bound in period.params()]
+    query = PERIOD_TOTALS_SQL.format(
+        group=GROUPINGS[grouping], columns=columns, table=table, ranges=ranges
+    )
+    return query, (*bounds, username, metric, *bounds)
+
+@cached_report
+def fetch_period_totals(username, metric, periods, grouping='account', statement_timeout=None):
+    """Sum metric over each period in one round trip, returning Accounts and period_<n> columns"""
+    query, params = period_totals_query(username, metric, periods, grouping)
+    with get_db_cursor(statement_timeout=statement_timeout) as cur:
+        cur.execute(query, params)
+        columns = ['Accounts'] + [f"period_{index}" for index in range(len(periods))]
+        return pd.DataFrame(cur.fetchall(), columns=columns)
+
+def percent_change(current, previous):
+    """(current - previous) / previous * 100 per element, 0 where previous is 0"""
+    current = np.asarray(current, dtype=float)
+    previous = np.asarray(previous, dtype=float)
+    change = np.zeros_like(current)
+    np.divide((current - previous) * 100, previous, out=change, where=previous != 0)
+    return change
+
+def drop_zero_rows(df, columns):
+    """Keep rows where any of columns is nonzero"""
+    return df[(df[columns].to_numpy(dtype=float) != 0).any(axis=1)].reset_index(drop=True)
+
+def compare_columns(df, current, previous, kind, difference='Difference', percent='Difference %'):
+    """Add difference and percent change of current against previous and type the result"""
+    values = df[[current, previous]].to_numpy(dtype=float)
+    df[current] = values[:, 0]
+    df[previous] = values[:, 1]
+    df[difference] = values[:, 0] - values[:, 1]
+    df[percent] = percent_change(values[:, 0], values[:, 1])
+    return ReportFrame(
+        df,
+        {current: kind, previous: kind, difference: kind, percent: PERCENT},
+        {percent: (current, previous)}
+    )
+
+def compare_period_pairs(username, metric, pairs, names=None, grouping='account',
+                         drop_zero=False, difference='Difference', percent='Difference %'):
+    """
+    Compare metric over several (current, previous) period pairs, such as
+    month over month and year over year, with one query for all of them.
+
+    Returns a ReportFrame per pair of Accounts, both totals, their difference
+    and percent change. Columns are named after the period labels unless
+    names gives a (current_name, previous_name) per pair; drop_zero leaves
+    out accounts with nothing in either period of the pair.
+    """
+    periods = []
+    for pair in pairs:
+        for period in pair:
+            if period not in periods:
+                periods.append(period)
+    totals = fetch_period_totals(username, metric, periods, grouping)
+
+    frames = []
+    for index, (current, previous) in enumerate(pairs):
+        current_name, previous_name = names[index] if names else (current.label, previous.label)
+        df = pd.DataFrame({
+            'Accounts': totals['Accounts'],
+            current_name: totals[f"period_{periods.index(current)}"],
+            previous_name: totals[f"period_{periods.index(previous)}"],
+        })
+        if drop_zero:
+            df = drop_zero_rows(df, [current_name, previous_name])
+        if df.empty:
+            frames.append(ReportFrame.empty_frame())
+            continue
+        frames.append(compare_columns(df, current_name, previous_name, metric_kind(metric),
+                                      difference, percent))
+    return frames
+
+def compare_periods(username, metric, current, previous, current_name=None, previous_name=None,
+                    grouping='account', drop_zero=False, difference='Difference',
+                    percent='Difference %'):
+    """Compare metric over two periods, see compare_period_pairs"""
+    names = [(current_name or current.label, previous_name or previous.label)]
+    return compare_period_pairs(username, metric, [(current, previous)], names, grouping,
+                                drop_zero, difference, percent)[0]
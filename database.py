@@ -1,10 +1,18 @@
 import os
 import psycopg2
+from psycopg2 import sql
 from psycopg2.extras import RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
 from contextlib import contextmanager
-import streamlit as st
+import pandas as pd
+import threading
 import time
+from db_pool import ConnectionPool, PoolTimeout
+
+# Statement timeouts in milliseconds. The default is applied once per
+# connection at connect time; the others are per-cursor overrides.
+DEFAULT_STATEMENT_TIMEOUT_MS = 30000
+LONG_STATEMENT_TIMEOUT_MS = 300000  # Imports and exports
+TILE_STATEMENT_TIMEOUT_MS = 5000  # Small dashboard lookups
 
 DB_CONFIG = {
     'host': 'ep-young-sound-a5fmuzwl.us-east-2.aws.neon.tech',
@@ -17,46 +25,145 @@ DB_CONFIG = {
     'keepalives_idle': 30,
     'keepalives_interval': 10,
     'keepalives_count': 5,
-    'connect_timeout': 10
+    'connect_timeout': 10,
+    'options': f'-c statement_timeout={DEFAULT_STATEMENT_TIMEOUT_MS}'
 }
 
+# Pool stats and load timings are shown in the UI only when REPORT_DEBUG=1
+DEBUG_DIAGNOSTICS = os.environ.get('REPORT_DEBUG') == '1'
+
 MAX_RETRIES = 3
 RETRY_DELAY = 1
 
-pool = SimpleConnectionPool(
-    minconn=5,
-    maxconn=20,
-    **DB_CONFIG
-)
+# Created on first use so importing this module costs no TLS handshakes
+pool = None
+_pool_lock = threading.Lock()
 
-@contextmanager
-def get_db_connection():
-    conn = None
-    for attempt in range(MAX_RETRIES):
+def get_pool():
+    """Return the connection pool, creating it on first use"""
+    global pool
+    if pool is None:
+        with _pool_lock:
+            if pool is None:
+                pool = ConnectionPool(
+                    minconn=5,
+                    maxconn=20,
+                    max_age=1800,
+                    timeout=30,
+                    **DB_CONFIG
+                )
+    return pool
+
+def prewarm_pool():
+    """Open the minimum pool connections in a background thread"""
+    def prefill():
         try:
-            conn = pool.getconn()
-            if not conn.closed:
-                yield conn
-                return
-            pool.putconn(conn)
-            conn = None
+            get_pool().prefill()
         except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                time.sleep(RETRY_DELAY)
-                continue
-            st.error(f"Database connection error: {str(e)}")
-            raise e
-        finally:
-            if conn is not None:
-                pool.putconn(conn)
+            # The first real query opens its own connection and reports errors
+            print(f"Database pre-warm failed: {str(e)}")
+
+    thread = threading.Thread(target=prefill, name="db-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+def checkout_connection():
+    """Check out a pooled connection, retrying connection failures"""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return get_pool().getconn()
+        except PoolTimeout:
+            # The pool already waited its full timeout
+            raise
+        except psycopg2.OperationalError:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(RETRY_DELAY)
+
+class DatabaseConnectionError(Exception):
+    """Raised when no pooled connection could be checked out"""
+
+@contextmanager
+def get_db_connection():
+    # Also runs on loader worker threads, which cannot call st.*, so the
+    # error is raised for the calling page to report
+    try:
+        conn = checkout_connection()
+    except Exception as e:
+        raise DatabaseConnectionError(f"Database connection error: {str(e)}") from e
+
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # The connection itself failed, so it must not go back to the pool
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+def get_pool_stats():
+    """Return in-use, idle, wait time and checkout latency figures of the pool, or None before first use"""
+    if pool is None:
+        return None
+    return pool.stats()
+
+class SessionCursor(RealDictCursor):
+    """
+    RealDictCursor that sends per-cursor session settings with its first
+    statement instead of in a round trip of their own. SET LOCAL lasts until
+    the transaction ends, and the pool rolls back every returned connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pending_settings = None
+
+    def set_statement_timeout(self, milliseconds):
+        """Apply a statement timeout to the rest of this cursor's transaction"""
+        self.pending_settings = f"SET LOCAL statement_timeout = {int(milliseconds)};"
+
+    def take_settings(self):
+        settings, self.pending_settings = self.pending_settings, None
+        return settings
+
+    def execute(self, query, vars=None):
+        settings = self.take_settings()
+        if settings is not None:
+            if isinstance(query, sql.Composable):
+                query = query.as_string(self)
+            if isinstance(query, bytes):
+                query = settings.encode(self.connection.encoding) + b" " + query
+            else:
+                query = f"{settings} {query}"
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        settings = self.take_settings()
+        if settings is not None:
+            super().execute(settings)
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        # COPY cannot share a query string, so the setting goes first on its own
+        settings = self.take_settings()
+        if settings is not None:
+            super().execute(settings)
+        return super().copy_expert(sql, file, size)
 
 @contextmanager
-def get_db_cursor(commit=False):
+def get_db_cursor(commit=False, statement_timeout=None):
+    """
+    Yield a dict cursor on a pooled connection, committing on success when
+    commit is set. statement_timeout overrides the connection default in
+    milliseconds for this cursor only, without an extra round trip.
+    """
     with get_db_connection() as conn:
         cursor = None
         try:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute('SET statement_timeout = 30000')
+            cursor = conn.cursor(cursor_factory=SessionCursor)
+            if statement_timeout is not None and statement_timeout != DEFAULT_STATEMENT_TIMEOUT_MS:
+                cursor.set_statement_timeout(statement_timeout)
             yield cursor
             if commit:
                 conn.commit()
@@ -68,6 +175,51 @@ def get_db_cursor(commit=False):
             if cursor is not None and not cursor.closed:
                 cursor.close()
 
+def fetch_dataframe(query, params=None, statement_timeout=None):
+    """Run one read query on its own pooled connection and return the rows as a DataFrame"""
+    with get_db_cursor(statement_timeout=statement_timeout) as cur:
+        cur.execute(query, params)
+        return pd.DataFrame(cur.fetchall())
+
+def run_query_batch(queries, statement_timeout=None, date_columns=('date',)):
+    """
+    Run several read queries in one round trip and return {name: DataFrame}.
+
+    queries is a list of (name, query, params). psycopg2 only returns the
+    last result of a multi-statement string, so each query is bound on the
+    client and wrapped as a json_agg() subselect of one SELECT, giving one
+    column per query. JSON carries no date type, so date_columns are parsed
+    back into dates; numbers come back as floats.
+    """
+    if not queries:
+        return {}
+
+    with get_db_cursor(statement_timeout=statement_timeout) as cur:
+        subselects = []
+        for name, query, params in queries:
+            bound = cur.mogrify(query, params).decode(cur.connection.encoding)
+            subselects.append(
+                f"(SELECT COALESCE(json_agg(batch_rows), '[]'::json) "
+                f"FROM ({bound}) batch_rows) AS {sql.Identifier(name).as_string(cur)}"
+            )
+        cur.execute("SELECT " + ",\n".join(subselects))
+        row = cur.fetchone()
+
+    frames = {}
+    for name, _, _ in queries:
+        df = pd.DataFrame(row[name])
+        for column in date_columns:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column]).dt.date
+        frames[name] = df
+    return frames
+
+def database_today():
+    """Return CURRENT_DATE of the database, the one "today" reports compare against"""
+    with get_db_cursor(statement_timeout=TILE_STATEMENT_TIMEOUT_MS) as cur:
+        cur.execute("SELECT CURRENT_DATE AS today")
+        return cur.fetchone()['today']
+
 def test_connection():
     for attempt in range(MAX_RETRIES):
         try:
@@ -0,0 +1,142 @@
+from datetime import datetime
+import pandas as pd
+
+# Formats tried, in order, when detecting the format of a date column.
+# Month-first comes before day-first so ambiguous strings such as 01/02/2024
+# read as January 2nd, as pandas inference did before formats were detected.
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+    '%m-%d-%Y %H:%M:%S',
+    '%m-%d-%Y %H:%M',
+    '%m-%d-%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d-%m-%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M',
+    '%d-%m-%Y',
+    '%d %b %Y',
+    '%d %B %Y'
+]
+
+# Non-null strings checked when detecting a format
+SAMPLE_SIZE = 100
+
+class DateNormalizer:
+    """
+    Parse date columns with one detected format per column key.
+
+    Detected formats live as long as the instance, so create one per file:
+    a file's chunks share its formats, and no file decides how another is read.
+    """
+
+    def __init__(self, formats=DATE_FORMATS, sample_size=SAMPLE_SIZE):
+        self.formats = list(formats)
+        self.sample_size = sample_size
+        self.cached_formats = {}
+
+    def detect_format(self, strings, hint=None, formats=None):
+        """Return the format that parses the most sampled strings, or None"""
+        sample = strings[strings != ''].dropna().head(self.sample_size).str.strip()
+        if sample.empty:
+            return None
+
+        candidates = formats if formats is not None else self.formats
+        if hint:
+            candidates = [hint] + [fmt for fmt in candidates if fmt != hint]
+
+        best_format, best_count = None, 0
+        for fmt in candidates:
+            count = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+            if count == len(sample):
+                return fmt
+            if count > best_count:
+                best_format, best_count = fmt, count
+        return best_format
+
+    def get_format(self, key, strings, hint=None):
+        """Return the cached format for key, detecting it from strings on first use"""
+        fmt = self.cached_formats.get(key)
+        if fmt is None:
+            fmt = self.detect_format(strings, hint)
+            if fmt is not None and key is not None:
+                self.cached_formats[key] = fmt
+        return fmt
+
+    def parse(self, values, key=None, hint=None):
+        """
+        Parse a Series into datetime64 values.
+        Strings are parsed with the format cached for key; rows that do not
+        match it are retried together with the format that best fits them,
+        and pandas inference is only used for what no known format matches.
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        if kind in ('datetime', 'datetime64', 'date', 'empty'):
+            return pd.to_datetime(values)
+
+        if kind == 'string':
+            return self.parse_column(values, key, hint)
+
+        # Mixed column, e.g. real date cells next to text dates
+        is_string = values.map(lambda value: isinstance(value, str))
+        result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        if (~is_string).any():
+            result[~is_string] = pd.to_datetime(values[~is_string])
+        if is_string.any():
+            result[is_string] = self.parse_column(values[is_string], key, hint)
+        return result
+
+    def parse_column(self, strings, key=None, hint=None):
+        """Parse string values with the format cached for key"""
+        fmt = self.get_format(key, strings, hint)
+        if fmt is None:
+            return pd.to_datetime(strings)
+        return self.parse_strings(strings, fmt)
+
+    def parse_strings(self, strings, fmt):
+        """Parse with fmt, then retry failures in bulk with the next best format"""
+        parsed = pd.to_datetime(strings, format=fmt, errors='coerce')
+        present = strings.notna() & (strings != '')
+        failed = parsed.isna() & present
+        if failed.any():
+            # Padded cells are the usual culprit, so retry them stripped
+            strings = strings.copy()
+            strings[failed] = strings[failed].str.strip()
+            parsed[failed] = pd.to_datetime(strings[failed], format=fmt, errors='coerce')
+            failed = parsed.isna() & present
+
+        tried = {fmt}
+        while failed.any():
+            remaining = strings[failed]
+            fmt = self.detect_format(
+                remaining,
+                formats=[candidate for candidate in self.formats if candidate not in tried]
+            )
+            if fmt is None:
+                # Let pandas infer whatever no known format matches
+                parsed[failed] = pd.to_datetime(remaining)
+                break
+            tried.add(fmt)
+            parsed[failed] = pd.to_datetime(remaining, format=fmt, errors='coerce')
+            failed = parsed.isna() & present
+        return parsed
+
+def parse_date_string(value, formats=DATE_FORMATS):
+    """Parse a single string with the first of formats that matches it, or return None"""
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
@@ -0,0 +1,249 @@
+import select
+import threading
+import time
+from collections import deque
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+# Upper bounds, in milliseconds, of the checkout latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, float('inf'))
+
+class PoolTimeout(PoolError):
+    """Raised when no connection frees up within the checkout timeout"""
+
+class PooledConnection:
+    """Bookkeeping for one physical connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    Nothing is opened on construction; connections are opened on demand and
+    prefill() opens minconn of them ahead of time.
+
+    Checkouts block for up to timeout seconds when maxconn connections are in
+    use. Connections older than max_age are replaced. Every reuse first checks
+    the idle socket without a round trip, since it only turns readable when
+    the server closed or is closing it, and pings the connection if so or once
+    it sat idle longer than validate_after. Returned connections are rolled
+    back so no transaction leaks into the next user.
+    """
+
+    def __init__(self, minconn, maxconn, max_age=1800, timeout=30,
+                 validate_after=30, connect=psycopg2.connect, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_age = max_age
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self.connect = connect
+        self.connect_kwargs = connect_kwargs
+
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.checked_out = {}
+        self.opened = 0
+        self.waiting = 0
+        self.closed = False
+
+        self.checkouts = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self.discarded = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.latency_counts = [0] * len(LATENCY_BUCKETS_MS)
+
+    def prefill(self):
+        """Open connections until minconn exist"""
+        while True:
+            with self.condition:
+                if self.closed or self.opened >= self.minconn:
+                    return
+                self.opened += 1
+
+            try:
+                pooled = self.open_connection()
+            except Exception:
+                with self.condition:
+                    self.opened -= 1
+                raise
+
+            with self.condition:
+                self.idle.append(pooled)
+                self.condition.notify()
+
+    def open_connection(self):
+        """Open a new physical connection"""
+        return PooledConnection(self.connect(**self.connect_kwargs))
+
+    def getconn(self, timeout=None):
+        """Check out a validated connection, waiting up to timeout seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        pooled = None
+        with self.condition:
+            while not self.closed and not self.idle and self.opened >= self.maxconn:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"No connection available within {timeout}s "
+                        f"({self.maxconn} in use)"
+                    )
+                self.waiting += 1
+                try:
+                    self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            if self.closed:
+                raise PoolError("connection pool is closed")
+            if self.idle:
+                pooled = self.idle.pop()
+            else:
+                # Reserve the slot, the connection is opened outside the lock
+                self.opened += 1
+
+        # Network work happens without holding the lock
+        try:
+            if pooled is None:
+                pooled = self.open_connection()
+            elif not self.is_usable(pooled):
+                self.close_connection(pooled)
+                pooled = self.open_connection()
+        except Exception:
+            with self.condition:
+                self.opened -= 1
+                self.condition.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self.condition:
+            self.checked_out[id(pooled.conn)] = pooled
+            self.record_checkout(waited)
+        return pooled.conn
+
+    def is_usable(self, pooled):
+        """Check age and liveness of an idle connection before handing it out"""
+        now = time.monotonic()
+        if now - pooled.created_at > self.max_age:
+            with self.condition:
+                self.recycled += 1
+            return False
+
+        alive = not pooled.conn.closed
+        if alive and (self.has_pending_input(pooled.conn)
+                      or now - pooled.returned_at > self.validate_after):
+            alive = self.ping(pooled.conn)
+        if not alive:
+            with self.condition:
+                self.discarded += 1
+        return alive
+
+    def has_pending_input(self, conn):
+        """
+        Whether an idle connection's socket has data waiting. Nothing is sent
+        to an idle session unless the server terminates it, so this catches
+        connections dropped since their last use at no round-trip cost.
+        """
+        try:
+            readable, _, _ = select.select([conn.fileno()], [], [], 0)
+        except (OSError, ValueError, psycopg2.Error):
+            return True
+        return bool(readable)
+
+    def ping(self, conn):
+        """Run a trivial statement to confirm the connection still works"""
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn, close=False):
+        """Return a connection, rolling back any open transaction"""
+        with self.condition:
+            pooled = self.checked_out.pop(id(conn), None)
+        if pooled is None:
+            raise PoolError("connection was not checked out from this pool")
+
+        if not close and not conn.closed:
+            try:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        if close or conn.closed or self.closed:
+            self.close_connection(pooled)
+            with self.condition:
+                self.opened -= 1
+                self.condition.notify()
+            return
+
+        pooled.returned_at = time.monotonic()
+        with self.condition:
+            self.idle.append(pooled)
+            self.condition.notify()
+
+    def close_connection(self, pooled):
+        """Close a physical connection, ignoring errors from dead sockets"""
+        try:
+            pooled.conn.close()
+        except psycopg2.Error:
+            pass
+
+    def record_checkout(self, waited):
+        """Update wait totals and the latency histogram, called under the lock"""
+        self.checkouts += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        waited_ms = waited * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if waited_ms <= bound:
+                self.latency_counts[index] += 1
+                break
+
+    def stats(self):
+        """Return a snapshot of pool usage"""
+        with self.condition:
+            return {
+                'in_use': len(self.checked_out),
+                'idle': len(self.idle),
+                'opened': self.opened,
+                'maxconn': self.maxconn,
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'recycled': self.recycled,
+                'discarded': self.discarded,
+                'total_wait_seconds': self.total_wait,
+                'avg_wait_ms': self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+                'latency_histogram_ms': {
+                    ('inf' if bound == float('inf') else f"<={bound:g}"): count
+                    for bound, count in zip(LATENCY_BUCKETS_MS, self.latency_counts)
+                }
+            }
+
+    def closeall(self):
+        """Close idle connections now and checked out ones when they are returned"""
+        with self.condition:
+            self.closed = True
+            idle = list(self.idle)
+            self.idle.clear()
+            self.opened -= len(idle)
+            self.condition.notify_all()
+        for pooled in idle:
+            self.close_connection(pooled)
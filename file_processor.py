@@ -1,12 +1,95 @@
 import streamlit as st
 import pandas as pd
-from database import get_db_cursor
+from psycopg2.extras import execute_values
+from database import LONG_STATEMENT_TIMEOUT_MS, get_db_cursor
+from parsers import (
+    MARKETPLACES,
+    parse_workbook,
+    parse_workbooks_parallel,
+    summarize_orders
+)
+from parse_cache import ParseCache
+from orders import load_orders
+from report_cache import invalidate_user
 import uuid
 from datetime import datetime
 
+# Rows sent per INSERT ... ON CONFLICT statement when saving summaries
+INCOME_UPSERT_BATCH_SIZE = 1000
+
+# Relies on the (username, store_account_id, date) unique key of income_data.
+# Unchanged rows and days derived from orders are skipped by the WHERE clause
+# and are not returned, and xmax = 0 only holds for freshly inserted tuples.
+INCOME_UPSERT_SQL = """
+    INSERT INTO income_data AS i
+    (UniqueID, username, Date, store_account_id, 
+     store_name, Account_name, Net_income)
+    VALUES %s
+    ON CONFLICT (username, store_account_id, date) DO UPDATE
+    SET Net_income = EXCLUDED.Net_income
+    WHERE i.source = 'summary'
+    AND i.Net_income IS DISTINCT FROM EXCLUDED.Net_income
+    RETURNING (xmax = 0) AS inserted
+"""
+
+# Store-days among the summaries that the order mode owns and keeps
+ORDER_DAYS_SQL = """
+    SELECT COUNT(*) AS days
+    FROM income_data i
+    JOIN unnest(%s::text[], %s::date[]) AS d(store_account_id, date)
+      ON d.store_account_id = i.store_account_id
+     AND d.date = i.date
+    WHERE i.username = %s
+    AND i.source = 'orders'
+"""
+
+def upsert_income_summaries(cur, username, processed_data, batch_size=INCOME_UPSERT_BATCH_SIZE):
+    """Bulk upsert daily summaries into income_data and count the outcome"""
+    # Key rows by store-day so a later file wins, as the row-by-row save did,
+    # and a single statement never touches the same row twice
+    rows = {}
+    for processed_file in processed_data:
+        summary = processed_file['data']
+        for date, net_income in zip(summary['Date'], summary['Net_income']):
+            rows[(processed_file['store_account_id'], date)] = (
+                str(uuid.uuid4()),
+                username,
+                date,
+                processed_file['store_account_id'],
+                processed_file['store_name'],
+                processed_file['account_name'],
+                float(net_income)
+            )
+
+    values = list(rows.values())
+    cur.execute(ORDER_DAYS_SQL, (
+        [store_account_id for store_account_id, _ in rows],
+        [date for _, date in rows],
+        username
+    ))
+    kept = cur.fetchone()['days']
+
+    inserted = 0
+    updated = 0
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        results = execute_values(cur, INCOME_UPSERT_SQL, batch,
+                                 page_size=batch_size, fetch=True)
+        batch_inserted = sum(1 for result in results if result['inserted'])
+        inserted += batch_inserted
+        updated += len(results) - batch_inserted
+
+    return {
+        'inserted': inserted,
+        'updated': updated,
+        'kept': kept,
+        'unchanged': len(values) - inserted - updated - kept
+    }
+
 class FileProcessor:
     def __init__(self):
         """Initialize the FileProcessor"""
+        self.parse_cache = ParseCache()
         self.setup_session_state()
 
     def setup_session_state(self):
@@ -76,142 +159,120 @@ class FileProcessor:
                 
                 st.markdown("---")
             
+            # Parsing runs in worker processes when several files are uploaded
+            parallel = st.checkbox(
+                "Parse files in parallel",
+                value=len(uploaded_files) > 1
+            )
+            
+            # Keeps every order in income_orders and derives the daily totals from it
+            orders = st.checkbox(
+                "Store order-level rows",
+                value=False
+            )
+            
             # Process button
             if st.button("Process all Files"):
-                self.process_files(uploaded_files)
+                self.process_files(uploaded_files, parallel=parallel, orders=orders)
             
             # Show summaries if data is processed
             if st.session_state.processed_data:
                 self.show_summaries()
 
-    def process_shopee_file(self, excel_file):
-        """Process Shopee excel file"""
-        try:
-            # Read specific sheet
-            df = pd.read_excel(excel_file, sheet_name='Income', header=None)
-            
-            # Find the header row (contains column names)
-            for idx, row in df.iterrows():
-                if row.astype(str).str.contains('No. Pesanan').any():
-                    header_row = idx
-                    break
-            
-            # Set proper headers and data
-            df.columns = df.iloc[header_row]
-            df = df.iloc[header_row + 1:].reset_index(drop=True)
-            
-            # Process date and amount
-            df['Tanggal Dana Dilepaskan'] = pd.to_datetime(df['Tanggal Dana Dilepaskan']).dt.date
-            df['Total Penghasilan'] = pd.to_numeric(df['Total Penghasilan'], errors='coerce')
-            
-            # Create summary
-            summary = df.groupby('Tanggal Dana Dilepaskan')['Total Penghasilan'].sum().reset_index()
-            summary.columns = ['Date', 'Net_income']
-            
-            return summary
+    def process_files(self, files, parallel=False, orders=False):
+        """Process all uploaded files"""
+        st.session_state.processed_data = []
         
-        except Exception as e:
-            st.error(f"Error processing Shopee file: {str(e)}")
-            return pd.DataFrame(columns=['Date', 'Net_income'])
-
-    def process_tokopedia_file(self, excel_file):
-        """Process Tokopedia excel file"""
-        try:
-            # Read Commission Report sheet
-            df = pd.read_excel(excel_file, sheet_name='Commission Report')
-            
-            # Create filtered datasets
-            df1 = df[df['Commission Name'] == 'Biaya Layanan Power Merchant']
-            df2 = df[df['Commission Name'] == 'Biaya Layanan Bebas Ongkir Power Merchant']
-            
-            # Convert dates
-            df1['Finish Date'] = pd.to_datetime(df1['Finish Date']).dt.date
-            df2['Finish Date'] = pd.to_datetime(df2['Finish Date']).dt.date
-            
-            # Convert numeric values
-            df1['Total Product Amount'] = pd.to_numeric(df1['Total Product Amount'], errors='coerce')
-            df1['Service Fee Gross'] = pd.to_numeric(df1['Service Fee Gross'], errors='coerce')
-            df2['Service Fee Gross'] = pd.to_numeric(df2['Service Fee Gross'], errors='coerce')
-            
-            # Calculate daily income
-            summary_data = []
-            dates = sorted(set(df1['Finish Date'].unique()) | set(df2['Finish Date'].unique()))
+        # Match each file with its store before parsing anything
+        jobs = []
+        for file in files:
+            store_info = st.session_state.file_store_mapping.get(file.name)
+            if not store_info:
+                st.error(f"Please select a store for {file.name}")
+                continue
             
-            for date in dates:
-                gross = df1[df1['Finish Date'] == date]['Total Product Amount'].sum()
-                fee1 = df1[df1['Finish Date'] == date]['Service Fee Gross'].sum()
-                fee2 = df2[df2['Finish Date'] == date]['Service Fee Gross'].sum()
-                
-                net_income = gross - fee1 - fee2
-                summary_data.append({
-                    'Date': date,
-                    'Net_income': net_income
-                })
+            store_type = store_info['store_name'].lower()
+            if store_type not in MARKETPLACES:
+                st.error(f"Unsupported store type: {store_info['store_name']}")
+                continue
             
-            return pd.DataFrame(summary_data)
+            jobs.append((file, store_info, store_type))
         
-        except Exception as e:
-            st.error(f"Error processing Tokopedia file: {str(e)}")
-            return pd.DataFrame(columns=['Date', 'Net_income'])
-
-    def process_tiktok_file(self, excel_file):
-        """Process TikTok excel file"""
-        try:
-            # Read Order Details sheet
-            df = pd.read_excel(excel_file, sheet_name='Order details')
-            
-            # Convert date and amount
-            df['Order settled time(UTC)'] = pd.to_datetime(df['Order settled time(UTC)']).dt.date
-            df['Total settlement amount'] = pd.to_numeric(df['Total settlement amount'], errors='coerce')
-            
-            # Create summary
-            summary = df.groupby('Order settled time(UTC)')['Total settlement amount'].sum().reset_index()
-            summary.columns = ['Date', 'Net_income']
-            
-            return summary
+        results = self.parse_with_cache(jobs, parallel, orders)
         
-        except Exception as e:
-            st.error(f"Error processing TikTok file: {str(e)}")
-            return pd.DataFrame(columns=['Date', 'Net_income'])
+        # Collect results in upload order
+        for (file, store_info, _), (parsed, error) in zip(jobs, results):
+            if error is not None:
+                st.error(f"Error processing {file.name}: {str(error)}")
+                continue
+            
+            if not parsed.empty:
+                processed_data = {
+                    'filename': file.name,
+                    'store_name': store_info['store_name'],
+                    'account_name': store_info['account_name'],
+                    'store_account_id': store_info['store_account_id'],
+                    'data': summarize_orders(parsed) if orders else parsed
+                }
+                if orders:
+                    processed_data['orders'] = parsed
+                st.session_state.processed_data.append(processed_data)
+                st.success(f"Successfully processed {file.name}")
 
-    def process_files(self, files):
-        """Process all uploaded files"""
-        st.session_state.processed_data = []
+    def parse_with_cache(self, jobs, parallel=False, orders=False):
+        """Return (summary, error) per job, parsing only files missing from the cache"""
+        payloads = [(store_type, file.getvalue(), orders) for file, _, store_type in jobs]
+        # Order-level frames are cached apart from the daily summaries
+        keys = [
+            self.parse_cache.make_key(data, f"{store_type}-orders" if orders else store_type)
+            for store_type, data, _ in payloads
+        ]
         
-        for file in files:
+        results = [None] * len(jobs)
+        pending = []
+        for index, key in enumerate(keys):
+            summary = self.parse_cache.get(key)
+            if summary is None:
+                pending.append(index)
+            else:
+                results[index] = (summary, None)
+        
+        pending_jobs = [jobs[index] for index in pending]
+        pending_payloads = [payloads[index] for index in pending]
+        if parallel and len(pending) > 1:
+            parsed = self.parse_files_in_processes(pending_jobs, pending_payloads)
+        else:
+            parsed = self.parse_files_sequentially(pending_payloads)
+        
+        for index, (summary, error) in zip(pending, parsed):
+            results[index] = (summary, error)
+            if error is None:
+                self.parse_cache.put(keys[index], summary)
+        return results
+
+    def parse_files_sequentially(self, payloads):
+        """Parse files one after another in the Streamlit process"""
+        results = []
+        for payload in payloads:
             try:
-                # Get store info
-                store_info = st.session_state.file_store_mapping.get(file.name)
-                if not store_info:
-                    st.error(f"Please select a store for {file.name}")
-                    continue
-                
-                # Process based on store type
-                store_type = store_info['store_name'].lower()
-                
-                if store_type == 'shopee':
-                    summary = self.process_shopee_file(file)
-                elif store_type == 'tokopedia':
-                    summary = self.process_tokopedia_file(file)
-                elif store_type == 'tiktok':
-                    summary = self.process_tiktok_file(file)
-                else:
-                    st.error(f"Unsupported store type: {store_info['store_name']}")
-                    continue
-                
-                if not summary.empty:
-                    processed_data = {
-                        'filename': file.name,
-                        'store_name': store_info['store_name'],
-                        'account_name': store_info['account_name'],
-                        'store_account_id': store_info['store_account_id'],
-                        'data': summary
-                    }
-                    st.session_state.processed_data.append(processed_data)
-                    st.success(f"Successfully processed {file.name}")
-                
+                results.append((parse_workbook(*payload), None))
             except Exception as e:
-                st.error(f"Error processing {file.name}: {str(e)}")
+                results.append((pd.DataFrame(columns=['Date', 'Net_income']), e))
+        return results
+
+    def parse_files_in_processes(self, jobs, payloads):
+        """Parse files in worker processes with per-file progress"""
+        progress = st.progress(0.0, text=f"Parsing {len(jobs)} files...")
+        
+        def on_progress(index, completed):
+            progress.progress(
+                completed / len(jobs),
+                text=f"Parsed {jobs[index][0].name} ({completed}/{len(jobs)})"
+            )
+        
+        results = parse_workbooks_parallel(payloads, on_progress=on_progress)
+        progress.empty()
+        return results
 
     def show_summaries(self):
         """Show summary tables for processed files"""
@@ -252,48 +313,45 @@ class FileProcessor:
             st.warning("No processed data to save.")
             return
             
+        order_level = [processed for processed in st.session_state.processed_data
+                       if 'orders' in processed]
+        daily = [processed for processed in st.session_state.processed_data
+                 if 'orders' not in processed]
+            
         try:
-            with get_db_cursor(commit=True) as cur:
-                for processed_file in st.session_state.processed_data:
-                    for _, row in processed_file['data'].iterrows():
-                        # Check for existing data from the same user
-                        cur.execute("""
-                            SELECT UniqueID 
-                            FROM income_data 
-                            WHERE Date = %s 
-                            AND store_account_id = %s
-                            AND username = %s
-                        """, (row['Date'], 
-                             processed_file['store_account_id'],
-                             st.session_state.username))
-                        
-                        existing_record = cur.fetchone()
-                        
-                        if existing_record:
-                            # Update existing record for this user
-                            cur.execute("""
-                                UPDATE income_data 
-                                SET Net_income = %s 
-                                WHERE UniqueID = %s
-                            """, (float(row['Net_income']), existing_record['uniqueid']))
-                        else:
-                            # Insert new record for this user
-                            cur.execute("""
-                                INSERT INTO income_data 
-                                (UniqueID, username, Date, store_account_id, 
-                                 store_name, Account_name, Net_income)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                            """, (
-                                str(uuid.uuid4()),
-                                st.session_state.username,
-                                row['Date'],
-                                processed_file['store_account_id'],
-                                processed_file['store_name'],
-                                processed_file['account_name'],
-                                float(row['Net_income'])
-                            ))
+            with get_db_cursor(commit=True, statement_timeout=LONG_STATEMENT_TIMEOUT_MS) as cur:
+                counts = {'orders': 0, 'changed': 0, 'duplicates': 0, 'repeated': 0,
+                          'inserted': 0, 'updated': 0, 'removed': 0, 'kept': 0,
+                          'unchanged': 0}
+                if daily:
+                    daily_counts = upsert_income_summaries(cur, st.session_state.username, daily)
+                    for name, value in daily_counts.items():
+                        counts[name] += value
+                if order_level:
+                    order_counts = load_orders(cur, st.session_state.username, order_level)
+                    for name, value in order_counts.items():
+                        counts[name] += value
+            invalidate_user(st.session_state.username)
                             
-            st.success("Data Saved Successfully!")
+            message = (
+                f"Data Saved Successfully! {counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {counts['unchanged']} unchanged."
+            )
+            if counts['removed']:
+                message += f" {counts['removed']} days without orders removed."
+            if counts['kept']:
+                message += (
+                    f" {counts['kept']} days kept because the other mode"
+                    f" (daily summary or order-level) already saved them."
+                )
+            if order_level:
+                message += (
+                    f" {counts['orders']} new orders loaded, "
+                    f"{counts['changed']} changed orders updated, "
+                    f"{counts['duplicates']} already ingested orders skipped, "
+                    f"{counts['repeated']} orders repeated within the upload merged."
+                )
+            st.success(message)
             
         except Exception as e:
-            st.error(f"Error saving to database: {str(e)}")
\ No newline at end of file
+            st.error(f"Error saving to database: {str(e)}")
@@ -0,0 +1,166 @@
+"""Batch-load marketplace exports into income_data without the Streamlit UI.
+
+Example:
+
+    python ingest.py exports/2023 "exports/2024/**/*.xlsx" --username alice \
+        --map "shopee_docil*=shopee_Docilworks" \
+        --map "tokped_*=tokopedia_bursawindshield" --dry-run
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from fnmatch import fnmatch
+
+from database import LONG_STATEMENT_TIMEOUT_MS, get_db_cursor
+from file_processor import upsert_income_summaries
+from orders import load_orders
+from parsers import MARKETPLACES, parse_workbooks_parallel, summarize_orders
+
+def parse_mapping(values):
+    """Turn PATTERN=STORE_ACCOUNT_ID arguments into ordered (pattern, id) pairs"""
+    mapping = []
+    for value in values:
+        pattern, separator, store_account_id = value.partition('=')
+        if not separator or not pattern or not store_account_id:
+            raise argparse.ArgumentTypeError(
+                f"Invalid mapping '{value}', expected PATTERN=STORE_ACCOUNT_ID"
+            )
+        mapping.append((pattern, store_account_id))
+    return mapping
+
+def collect_files(paths):
+    """Expand directories and glob patterns into a sorted list of .xlsx files"""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(path, '**', '*.xlsx'), recursive=True)
+        else:
+            matches = glob.glob(path, recursive=True)
+        files.update(match for match in matches
+                     if os.path.isfile(match) and match.lower().endswith('.xlsx'))
+    return sorted(files)
+
+def match_store(path, mapping):
+    """Return the store_account_id of the first pattern matching the file"""
+    for pattern, store_account_id in mapping:
+        if fnmatch(os.path.basename(path), pattern) or fnmatch(path, pattern):
+            return store_account_id
+    return None
+
+def get_stores(username, store_account_ids):
+    """Fetch store rows for the mapped store account IDs"""
+    with get_db_cursor() as cur:
+        cur.execute("""
+            SELECT Store_Account_ID, Store_name, Account_name
+            FROM ecom_store
+            WHERE username = %s
+            AND Store_Account_ID = ANY(%s)
+        """, (username, list(store_account_ids)))
+        return {row['store_account_id']: row for row in cur.fetchall()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest marketplace exports into income_data")
+    parser.add_argument('paths', nargs='+', help="Directories or glob patterns of .xlsx exports")
+    parser.add_argument('--username', required=True, help="Owner of the store accounts")
+    parser.add_argument('--map', dest='mapping', action='append', default=[],
+                        metavar='PATTERN=STORE_ACCOUNT_ID',
+                        help="File name pattern to store account, first match wins (repeatable)")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument('--orders', action='store_true',
+                        help="Load order-level rows and derive daily income from them")
+    parser.add_argument('--dry-run', action='store_true', help="Parse and report without writing")
+    args = parser.parse_args(argv)
+
+    try:
+        mapping = parse_mapping(args.mapping)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    if not mapping:
+        parser.error("At least one --map PATTERN=STORE_ACCOUNT_ID is required")
+
+    files = collect_files(args.paths)
+    if not files:
+        print("No .xlsx files found.")
+        return 1
+
+    assignments = {path: match_store(path, mapping) for path in files}
+    stores = get_stores(args.username, {store_id for store_id in assignments.values() if store_id})
+
+    jobs = []
+    for path in files:
+        store_account_id = assignments[path]
+        store_info = stores.get(store_account_id)
+        if store_account_id is None:
+            print(f"SKIP {path}: no mapping pattern matches")
+        elif store_info is None:
+            print(f"SKIP {path}: store account {store_account_id} not found for {args.username}")
+        elif store_info['store_name'].lower() not in MARKETPLACES:
+            print(f"SKIP {path}: unsupported store type {store_info['store_name']}")
+        else:
+            jobs.append((path, store_info))
+
+    if not jobs:
+        print("Nothing to ingest.")
+        return 1
+
+    started = time.perf_counter()
+    payloads = []
+    for path, store_info in jobs:
+        with open(path, 'rb') as excel_file:
+            payloads.append((store_info['store_name'].lower(), excel_file.read(), args.orders))
+
+    def on_progress(index, completed):
+        print(f"[{completed}/{len(jobs)}] parsed {jobs[index][0]}")
+
+    results = parse_workbooks_parallel(payloads, max_workers=args.workers, on_progress=on_progress)
+    parse_seconds = time.perf_counter() - started
+
+    processed_data = []
+    failed = 0
+    for (path, store_info), (parsed, error) in zip(jobs, results):
+        if error is not None:
+            failed += 1
+            print(f"ERROR {path}: {error}")
+            continue
+        if not parsed.empty:
+            processed = {
+                'filename': os.path.basename(path),
+                'store_name': store_info['store_name'],
+                'account_name': store_info['account_name'],
+                'store_account_id': store_info['store_account_id'],
+                'data': summarize_orders(parsed) if args.orders else parsed
+            }
+            if args.orders:
+                processed['orders'] = parsed
+            processed_data.append(processed)
+
+    rows = sum(len(processed['data']) for processed in processed_data)
+    write_seconds = 0.0
+    if args.dry_run:
+        print(f"Dry run: {rows} store-day rows from {len(processed_data)} files not written.")
+    elif processed_data:
+        write_started = time.perf_counter()
+        with get_db_cursor(commit=True, statement_timeout=LONG_STATEMENT_TIMEOUT_MS) as cur:
+            if args.orders:
+                counts = load_orders(cur, args.username, processed_data)
+            else:
+                counts = upsert_income_summaries(cur, args.username, processed_data)
+        write_seconds = time.perf_counter() - write_started
+        if args.orders:
+            print(f"Orders: {counts['orders']} new, {counts['changed']} changed, "
+                  f"{counts['duplicates']} already ingested, "
+                  f"{counts['repeated']} repeated within the upload.")
+        print(f"Saved: {counts['inserted']} inserted, {counts['updated']} updated, "
+              f"{counts['unchanged']} unchanged, {counts['kept']} kept from the other mode.")
+
+    total_seconds = time.perf_counter() - started
+    print(f"Files: {len(jobs) - failed} parsed, {failed} failed in {parse_seconds:.2f}s "
+          f"({len(jobs) / parse_seconds:.1f} files/s)")
+    print(f"Rows: {rows} in {total_seconds:.2f}s total "
+          f"({rows / total_seconds:.1f} rows/s, write {write_seconds:.2f}s)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
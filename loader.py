@@ -0,0 +1,65 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Each task holds its own pooled connection while it runs, so keep this well
+# under the pool's maxconn to leave room for other sessions
+MAX_LOADER_WORKERS = 4
+
+class ConcurrentLoader:
+    """
+    Run independent report fetches on a bounded thread pool.
+
+    Tasks run outside the Streamlit script thread, so they must not read
+    st.session_state or call st.* themselves; resolve the username and every
+    other input in the script thread and pass them in as arguments.
+    """
+
+    def __init__(self, max_workers=MAX_LOADER_WORKERS):
+        self.max_workers = max_workers
+        self.tasks = []
+        self.timings = {}
+        self.wall_time = 0.0
+
+    def add(self, name, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) under name"""
+        self.tasks.append((name, func, args, kwargs))
+        return self
+
+    def timed(self, name, func, args, kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def run(self):
+        """Run every queued task, wait for all of them and return {name: result}"""
+        started = time.perf_counter()
+        workers = max(1, min(self.max_workers, len(self.tasks)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-loader") as executor:
+            futures = [
+                (name, executor.submit(self.timed, name, func, args, kwargs))
+                for name, func, args, kwargs in self.tasks
+            ]
+            # Collect every outcome before raising so no task is left running
+            outcomes = {}
+            for name, future in futures:
+                try:
+                    outcomes[name] = (future.result(), None)
+                except Exception as e:
+                    outcomes[name] = (None, e)
+        self.wall_time = time.perf_counter() - started
+
+        for name, (_, error) in outcomes.items():
+            if error is not None:
+                raise error
+        return {name: result for name, (result, _) in outcomes.items()}
+
+    def summary(self):
+        """One line comparing wall-clock time with the summed task time"""
+        summed = sum(self.timings.values())
+        detail = ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.timings.items())
+        return (
+            f"Loaded {len(self.timings)} datasets in {self.wall_time * 1000:.0f} ms wall-clock, "
+            f"{summed * 1000:.0f} ms summed ({detail})"
+        )
@@ -3,6 +3,7 @@ from auth import AuthSystem
 from store_management import StoreManager
 from file_processor import FileProcessor
 from reports import ReportGenerator
+from database import DEBUG_DIAGNOSTICS, get_pool_stats, prewarm_pool
 
 class IncomeReportApp:
     def __init__(self):
@@ -28,6 +29,7 @@ class IncomeReportApp:
             # Check authentication first
             if not self.auth.check_authentication():
                 self.auth.init_login_page()
+                self.prewarm_database()
                 return
 
             # If authenticated, show the main application
@@ -37,6 +39,12 @@ class IncomeReportApp:
         except Exception as e:
             st.error(f"Runtime Error: {str(e)}")
 
+    def prewarm_database(self):
+        """Open pool connections once the login page has been sent"""
+        if not st.session_state.get('db_prewarm_started'):
+            st.session_state.db_prewarm_started = True
+            prewarm_pool()
+
     def render_sidebar(self):
         """Render the sidebar navigation"""
         with st.sidebar:
@@ -55,6 +63,21 @@ class IncomeReportApp:
             if st.button("Logout", type="primary"):
                 self.auth.logout()
                 st.rerun()
+            
+            if DEBUG_DIAGNOSTICS:
+                self.render_pool_stats()
+
+    def render_pool_stats(self):
+        """Show live connection pool figures, for debugging only"""
+        with st.expander("Connection pool"):
+            stats = get_pool_stats()
+            if stats is None:
+                st.write("Not connected yet")
+                return
+            st.write(f"In use: {stats['in_use']} / {stats['maxconn']}, idle: {stats['idle']}")
+            st.write(f"Waiting: {stats['waiting']}, timeouts: {stats['timeouts']}")
+            st.write(f"Checkout wait: {stats['avg_wait_ms']:.1f}ms avg, {stats['max_wait_ms']:.1f}ms max")
+            st.bar_chart(stats['latency_histogram_ms'])
 
     def handle_navigation(self):
         """Handle page navigation based on selection"""
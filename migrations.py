@@ -0,0 +1,699 @@
+"""Versioned schema migrations for the report tables.
+
+    python migrations.py migrate            apply pending migrations
+    python migrations.py status             list applied and pending versions
+    python migrations.py verify             check the expected indexes exist and are valid
+    python migrations.py explain --username alice [--start 2024-01-01 --end 2024-12-31]
+                                            print EXPLAIN ANALYZE plans of the report queries
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+
+from database import LONG_STATEMENT_TIMEOUT_MS, get_db_cursor
+from comparison import period_totals_query
+from periods import Period
+from report_queries import (admin_data_query, admin_page_filters, admin_page_query,
+                            current_month_queries, income_page_filters, income_page_query,
+                            store_income_query, total_income_query)
+from rollups import INCOME_METRIC
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied safely"""
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+def check_income_duplicates(cur):
+    """Refuse to add the store-day unique key while duplicate rows exist"""
+    cur.execute("""
+        SELECT username, store_account_id, date, COUNT(*) AS copies
+        FROM income_data
+        GROUP BY username, store_account_id, date
+        HAVING COUNT(*) > 1
+        ORDER BY copies DESC
+        LIMIT 20
+    """)
+    duplicates = cur.fetchall()
+    if duplicates:
+        examples = ', '.join(
+            f"{row['username']}/{row['store_account_id']}/{row['date']} x{row['copies']}"
+            for row in duplicates
+        )
+        raise MigrationError(
+            f"income_data has duplicate (username, store_account_id, date) rows, "
+            f"merge them before migrating: {examples}"
+        )
+
+# The SQL of released migrations is written out here rather than built from
+# the modules that use the tables, so editing those modules can never change
+# what an applied version did. Schema changes go in a new migration.
+
+# Order-level fact table. The primary key doubles as the per-store order ID
+# index, and the settlement index covers the daily rollup into income_data.
+ORDERS_SQL = """
+    CREATE TABLE IF NOT EXISTS income_orders (
+        username TEXT NOT NULL,
+        store_account_id TEXT NOT NULL,
+        order_id TEXT NOT NULL,
+        settlement_date DATE NOT NULL,
+        gross_amount NUMERIC NOT NULL DEFAULT 0,
+        fees NUMERIC NOT NULL DEFAULT 0,
+        net_amount NUMERIC NOT NULL DEFAULT 0,
+        loaded_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (username, store_account_id, order_id)
+    );
+    CREATE INDEX IF NOT EXISTS income_orders_settlement_idx
+        ON income_orders (username, store_account_id, settlement_date)
+        INCLUDE (net_amount);
+"""
+
+# Daily and monthly rollups of income_data and imp_gs_admininput, backfilled
+# from the current rows. Statement-level triggers fold every insert, update
+# and delete into both rollups inside the writing transaction and drop rows
+# left empty.
+ROLLUPS_SQL = """
+    CREATE TABLE IF NOT EXISTS report_daily_rollup (
+        username TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        day DATE NOT NULL,
+        store_account_id TEXT NOT NULL,
+        total NUMERIC NOT NULL DEFAULT 0,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (username, metric, day, store_account_id)
+    );
+    CREATE TABLE IF NOT EXISTS report_monthly_rollup (
+        username TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        month DATE NOT NULL,
+        store_account_id TEXT NOT NULL,
+        total NUMERIC NOT NULL DEFAULT 0,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (username, metric, month, store_account_id)
+    );
+
+    DELETE FROM report_daily_rollup WHERE metric IN (SELECT DISTINCT 'income' FROM income_data);
+    DELETE FROM report_monthly_rollup WHERE metric IN (SELECT DISTINCT 'income' FROM income_data);
+
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   COALESCE(net_income, 0) AS amount, 1 AS row_delta
+            FROM income_data
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+
+    CREATE OR REPLACE FUNCTION rollup_income_data_changes() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   COALESCE(net_income, 0) AS amount, 1 AS row_delta
+            FROM new_rows
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+        ELSIF TG_OP = 'DELETE' THEN
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   -COALESCE(net_income, 0) AS amount, -1 AS row_delta
+            FROM old_rows
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+
+        DELETE FROM report_daily_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   -COALESCE(net_income, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.day = k.day
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        DELETE FROM report_monthly_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   -COALESCE(net_income, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.month = DATE_TRUNC('month', k.day)::date
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        ELSE
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   COALESCE(net_income, 0) AS amount, 1 AS row_delta
+            FROM new_rows UNION ALL
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   -COALESCE(net_income, 0) AS amount, -1 AS row_delta
+            FROM old_rows
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+
+        DELETE FROM report_daily_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   -COALESCE(net_income, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.day = k.day
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        DELETE FROM report_monthly_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, 'income' AS metric,
+                   -COALESCE(net_income, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.month = DATE_TRUNC('month', k.day)::date
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+
+    DROP TRIGGER IF EXISTS income_data_rollup_insert ON income_data;
+    CREATE TRIGGER income_data_rollup_insert AFTER INSERT ON income_data
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_income_data_changes();
+    DROP TRIGGER IF EXISTS income_data_rollup_update ON income_data;
+    CREATE TRIGGER income_data_rollup_update AFTER UPDATE ON income_data
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_income_data_changes();
+    DROP TRIGGER IF EXISTS income_data_rollup_delete ON income_data;
+    CREATE TRIGGER income_data_rollup_delete AFTER DELETE ON income_data
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_income_data_changes();
+
+    DELETE FROM report_daily_rollup WHERE metric IN (SELECT DISTINCT type FROM imp_gs_admininput);
+    DELETE FROM report_monthly_rollup WHERE metric IN (SELECT DISTINCT type FROM imp_gs_admininput);
+
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   COALESCE(value, 0) AS amount, 1 AS row_delta
+            FROM imp_gs_admininput
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+
+    CREATE OR REPLACE FUNCTION rollup_imp_gs_admininput_changes() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   COALESCE(value, 0) AS amount, 1 AS row_delta
+            FROM new_rows
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+        ELSIF TG_OP = 'DELETE' THEN
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   -COALESCE(value, 0) AS amount, -1 AS row_delta
+            FROM old_rows
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+
+        DELETE FROM report_daily_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   -COALESCE(value, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.day = k.day
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        DELETE FROM report_monthly_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   -COALESCE(value, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.month = DATE_TRUNC('month', k.day)::date
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        ELSE
+        WITH deltas AS (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   COALESCE(value, 0) AS amount, 1 AS row_delta
+            FROM new_rows UNION ALL
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   -COALESCE(value, 0) AS amount, -1 AS row_delta
+            FROM old_rows
+        ),
+        daily AS (
+            INSERT INTO report_daily_rollup AS r
+            (username, metric, day, store_account_id, total, row_count)
+            SELECT username, metric, day, store_account_id, SUM(amount), SUM(row_delta)
+            FROM deltas
+            GROUP BY username, metric, day, store_account_id
+            ON CONFLICT (username, metric, day, store_account_id) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                row_count = r.row_count + EXCLUDED.row_count
+        )
+        INSERT INTO report_monthly_rollup AS r
+        (username, metric, month, store_account_id, total, row_count)
+        SELECT username, metric, DATE_TRUNC('month', day)::date, store_account_id,
+               SUM(amount), SUM(row_delta)
+        FROM deltas
+        GROUP BY username, metric, DATE_TRUNC('month', day)::date, store_account_id
+        ON CONFLICT (username, metric, month, store_account_id) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            row_count = r.row_count + EXCLUDED.row_count;
+
+        DELETE FROM report_daily_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   -COALESCE(value, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.day = k.day
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        DELETE FROM report_monthly_rollup r
+        USING (
+            SELECT username, store_account_id, date::date AS day, type AS metric,
+                   -COALESCE(value, 0) AS amount, -1 AS row_delta
+            FROM old_rows) k
+        WHERE r.username = k.username
+        AND r.metric = k.metric
+        AND r.month = DATE_TRUNC('month', k.day)::date
+        AND r.store_account_id = k.store_account_id
+        AND r.row_count <= 0;
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+
+    DROP TRIGGER IF EXISTS imp_gs_admininput_rollup_insert ON imp_gs_admininput;
+    CREATE TRIGGER imp_gs_admininput_rollup_insert AFTER INSERT ON imp_gs_admininput
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_imp_gs_admininput_changes();
+    DROP TRIGGER IF EXISTS imp_gs_admininput_rollup_update ON imp_gs_admininput;
+    CREATE TRIGGER imp_gs_admininput_rollup_update AFTER UPDATE ON imp_gs_admininput
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_imp_gs_admininput_changes();
+    DROP TRIGGER IF EXISTS imp_gs_admininput_rollup_delete ON imp_gs_admininput;
+    CREATE TRIGGER imp_gs_admininput_rollup_delete AFTER DELETE ON imp_gs_admininput
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION rollup_imp_gs_admininput_changes();
+"""
+
+# Marks which ingestion mode wrote each income_data day, 'summary' for daily
+# summaries and 'orders' for days derived from income_orders, so neither mode
+# overwrites the other's days. Days that already have orders become 'orders'.
+INCOME_SOURCE_SQL = """
+    ALTER TABLE income_data
+        ADD COLUMN IF NOT EXISTS source TEXT NOT NULL DEFAULT 'summary';
+    UPDATE income_data i
+    SET source = 'orders'
+    WHERE EXISTS (
+        SELECT 1 FROM income_orders o
+        WHERE o.username = i.username
+        AND o.store_account_id = i.store_account_id
+        AND o.settlement_date = i.date
+    );
+"""
+
+# Per-user data version, stamped by statement-level triggers on every write
+# to the rollup sources, so report caches see changes made by anyone.
+DATA_VERSION_STAMPS_SQL = """
+    CREATE TABLE IF NOT EXISTS report_data_version (
+        username TEXT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE OR REPLACE FUNCTION stamp_report_data_version() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO report_data_version AS v (username, version)
+            SELECT DISTINCT username, 1 FROM (SELECT username FROM new_rows) changed
+            ON CONFLICT (username) DO UPDATE
+            SET version = v.version + 1,
+                changed_at = now();
+        ELSIF TG_OP = 'DELETE' THEN
+            INSERT INTO report_data_version AS v (username, version)
+            SELECT DISTINCT username, 1 FROM (SELECT username FROM old_rows) changed
+            ON CONFLICT (username) DO UPDATE
+            SET version = v.version + 1,
+                changed_at = now();
+        ELSE
+            INSERT INTO report_data_version AS v (username, version)
+            SELECT DISTINCT username, 1 FROM (SELECT username FROM new_rows UNION SELECT username FROM old_rows) changed
+            ON CONFLICT (username) DO UPDATE
+            SET version = v.version + 1,
+                changed_at = now();
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+
+    DROP TRIGGER IF EXISTS income_data_version_insert ON income_data;
+    CREATE TRIGGER income_data_version_insert AFTER INSERT ON income_data
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stamp_report_data_version();
+    DROP TRIGGER IF EXISTS income_data_version_update ON income_data;
+    CREATE TRIGGER income_data_version_update AFTER UPDATE ON income_data
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stamp_report_data_version();
+    DROP TRIGGER IF EXISTS income_data_version_delete ON income_data;
+    CREATE TRIGGER income_data_version_delete AFTER DELETE ON income_data
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stamp_report_data_version();
+
+    DROP TRIGGER IF EXISTS imp_gs_admininput_version_insert ON imp_gs_admininput;
+    CREATE TRIGGER imp_gs_admininput_version_insert AFTER INSERT ON imp_gs_admininput
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stamp_report_data_version();
+    DROP TRIGGER IF EXISTS imp_gs_admininput_version_update ON imp_gs_admininput;
+    CREATE TRIGGER imp_gs_admininput_version_update AFTER UPDATE ON imp_gs_admininput
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stamp_report_data_version();
+    DROP TRIGGER IF EXISTS imp_gs_admininput_version_delete ON imp_gs_admininput;
+    CREATE TRIGGER imp_gs_admininput_version_delete AFTER DELETE ON imp_gs_admininput
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION stamp_report_data_version();
+"""
+
+# (version, name, SQL, optional pre-check). Versions are applied in order,
+# each in its own transaction, and are never edited once released.
+MIGRATIONS = [
+    (1, 'income_data store-day unique key', """
+        CREATE UNIQUE INDEX IF NOT EXISTS income_data_user_store_date_key
+            ON income_data (username, store_account_id, date)
+            INCLUDE (net_income)
+    """, check_income_duplicates),
+    (2, 'income_data covering index by date', """
+        CREATE INDEX IF NOT EXISTS income_data_user_date_idx
+            ON income_data (username, date)
+            INCLUDE (store_account_id, store_name, account_name, net_income)
+    """, None),
+    (3, 'imp_gs_admininput covering index by type and date', """
+        CREATE INDEX IF NOT EXISTS imp_gs_admininput_user_type_date_idx
+            ON imp_gs_admininput (username, type, date)
+            INCLUDE (store_account_id, value)
+    """, None),
+    (4, 'income_orders fact table', ORDERS_SQL, None),
+    (5, 'daily and monthly report rollups', ROLLUPS_SQL, None),
+    (6, 'imp_gs_admininput keyset index by date', """
+        CREATE INDEX IF NOT EXISTS imp_gs_admininput_user_date_key_idx
+            ON imp_gs_admininput (username, date, store_account_id, type)
+            INCLUDE (value)
+    """, None),
+    (7, 'income_data source of each day', INCOME_SOURCE_SQL, None),
+    (8, 'imp_gs_admininput keyset index with a unique tie-breaker', """
+        DROP INDEX IF EXISTS imp_gs_admininput_user_date_key_idx;
+        CREATE INDEX IF NOT EXISTS imp_gs_admininput_user_date_uid_idx
+            ON imp_gs_admininput (username, date, store_account_id, type, UniqueID)
+            INCLUDE (value)
+    """, None),
+    (9, 'report data version stamps', DATA_VERSION_STAMPS_SQL, None),
+]
+
+# Index name to table, checked by verify
+EXPECTED_INDEXES = {
+    'income_data_user_store_date_key': 'income_data',
+    'income_data_user_date_idx': 'income_data',
+    'imp_gs_admininput_user_type_date_idx': 'imp_gs_admininput',
+    'imp_gs_admininput_user_date_uid_idx': 'imp_gs_admininput',
+    'income_orders_pkey': 'income_orders',
+    'income_orders_settlement_idx': 'income_orders',
+    'report_daily_rollup_pkey': 'report_daily_rollup',
+    'report_monthly_rollup_pkey': 'report_monthly_rollup',
+}
+
+def report_queries(username, start, end, data_type):
+    """
+    The statements the reports run for username over [start, end], built by
+    the same builders reports.py and comparison.py call, as {name: (query, params)}
+    """
+    period = Period.custom(start, end)
+    today = Period.day(end)
+    month = Period.month_to_date(end)
+    whole_month = Period.month(end.year, end.month)
+    queries = {
+        'overview total income': total_income_query(username, period),
+        'overview income by store': store_income_query(username, period),
+        'overview admin input': admin_data_query(username, data_type, period),
+    }
+    for name, query in current_month_queries(username, end).items():
+        queries[f"current month {name}"] = query
+    queries.update({
+        'month over month and year over year from monthly rollup': period_totals_query(
+            username, INCOME_METRIC,
+            [whole_month, whole_month.previous(), Period.month(end.year - 1, end.month)]
+        ),
+        'month to date comparison from daily rollup': period_totals_query(
+            username, INCOME_METRIC, [month, month.previous()]
+        ),
+        'day comparison from daily rollup': period_totals_query(
+            username, data_type, [today, today.previous()]
+        ),
+        'income data first page': income_page_query(*income_page_filters(username, period=period)),
+        'admin input first page': admin_page_query(*admin_page_filters(username, period=period)),
+    })
+    return queries
+
+def get_applied_versions(cur):
+    """Return the set of applied migration versions"""
+    cur.execute(SCHEMA_MIGRATIONS_DDL)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row['version'] for row in cur.fetchall()}
+
+def migrate():
+    """Apply pending migrations in order, one transaction each"""
+    with get_db_cursor(commit=True) as cur:
+        applied = get_applied_versions(cur)
+
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+    if not pending:
+        print("Schema is up to date.")
+        return 0
+
+    for version, name, statement, precheck in pending:
+        print(f"Applying {version}: {name}")
+        with get_db_cursor(commit=True, statement_timeout=LONG_STATEMENT_TIMEOUT_MS) as cur:
+            if precheck is not None:
+                precheck(cur)
+            cur.execute(statement)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name)
+            )
+    print(f"Applied {len(pending)} migration(s).")
+    return 0
+
+def status():
+    """Print applied and pending migrations"""
+    with get_db_cursor(commit=True) as cur:
+        applied = get_applied_versions(cur)
+    for version, name, _, _ in MIGRATIONS:
+        print(f"{'applied' if version in applied else 'pending'}  {version}: {name}")
+    return 0
+
+def verify():
+    """Check every expected index exists and is valid"""
+    with get_db_cursor() as cur:
+        cur.execute("""
+            SELECT c.relname AS index_name, t.relname AS table_name, i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_class t ON t.oid = i.indrelid
+            WHERE c.relname = ANY(%s)
+        """, (list(EXPECTED_INDEXES),))
+        found = {row['index_name']: row for row in cur.fetchall()}
+
+    problems = 0
+    for index_name, table_name in EXPECTED_INDEXES.items():
+        row = found.get(index_name)
+        if row is None:
+            print(f"MISSING  {table_name}.{index_name}")
+            problems += 1
+        elif row['table_name'] != table_name:
+            print(f"WRONG    {index_name} is on {row['table_name']}, expected {table_name}")
+            problems += 1
+        elif not row['indisvalid']:
+            print(f"INVALID  {table_name}.{index_name}")
+            problems += 1
+        else:
+            print(f"OK       {table_name}.{index_name}")
+    return 1 if problems else 0
+
+def explain(username, start, end, data_type):
+    """Print EXPLAIN ANALYZE plans of the report queries"""
+    with get_db_cursor(statement_timeout=LONG_STATEMENT_TIMEOUT_MS) as cur:
+        for name, (query, params) in report_queries(username, start, end, data_type).items():
+            cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", params)
+            print(f"== {name}")
+            for row in cur.fetchall():
+                print(row['QUERY PLAN'])
+            print()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the report schema")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('migrate', help="Apply pending migrations")
+    commands.add_parser('status', help="List applied and pending migrations")
+    commands.add_parser('verify', help="Check the expected indexes")
+    explain_parser = commands.add_parser('explain', help="Print EXPLAIN ANALYZE plans of report queries")
+    explain_parser.add_argument('--username', required=True)
+    explain_parser.add_argument('--start', type=date.fromisoformat,
+                                default=date.today() - timedelta(days=90))
+    explain_parser.add_argument('--end', type=date.fromisoformat, default=date.today())
+    explain_parser.add_argument('--type', default='Pengunjung', help="Admin input type to query")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'migrate':
+            return migrate()
+        if args.command == 'status':
+            return status()
+        if args.command == 'verify':
+            return verify()
+        return explain(args.username, args.start, args.end, args.type)
+    except MigrationError as e:
+        print(f"Migration failed: {str(e)}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import csv
+from io import StringIO
+import pandas as pd
+
+# Order IDs sent per existence probe
+ORDER_PROBE_BATCH_SIZE = 10000
+
+# Per-transaction staging table filled by COPY
+STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS income_orders_staging (
+        store_account_id TEXT NOT NULL,
+        order_id TEXT NOT NULL,
+        settlement_date DATE NOT NULL,
+        gross_amount NUMERIC NOT NULL,
+        fees NUMERIC NOT NULL,
+        net_amount NUMERIC NOT NULL
+    ) ON COMMIT DELETE ROWS
+"""
+
+STAGING_COPY_SQL = """
+    COPY income_orders_staging
+    (store_account_id, order_id, settlement_date, gross_amount, fees, net_amount)
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+# Served by the primary key index
+EXISTING_ORDERS_SQL = """
+    SELECT order_id, settlement_date, gross_amount, net_amount
+    FROM income_orders
+    WHERE username = %s
+    AND store_account_id = %s
+    AND order_id = ANY(%s)
+"""
+
+# Staging holds new orders and orders whose stored copy differs. The latest
+# copy wins, as it did before the dedup stage; identical copies loaded
+# concurrently since the probe are left alone. Returns every store-day whose
+# total can change: the days orders were written to, plus the previous days
+# of changed orders that moved to another settlement date.
+ORDERS_UPSERT_SQL = """
+    WITH previous AS (
+        SELECT o.store_account_id, o.settlement_date
+        FROM income_orders o
+        JOIN income_orders_staging s
+          ON s.store_account_id = o.store_account_id
+         AND s.order_id = o.order_id
+        WHERE o.username = %(username)s
+    ),
+    written AS (
+        INSERT INTO income_orders AS o
+        (username, store_account_id, order_id, settlement_date,
+         gross_amount, fees, net_amount)
+        SELECT %(username)s, store_account_id, order_id, settlement_date,
+               gross_amount, fees, net_amount
+        FROM income_orders_staging
+        ON CONFLICT (username, store_account_id, order_id) DO UPDATE
+        SET settlement_date = EXCLUDED.settlement_date,
+            gross_amount = EXCLUDED.gross_amount,
+            fees = EXCLUDED.fees,
+            net_amount = EXCLUDED.net_amount,
+            loaded_at = now()
+        WHERE (o.settlement_date, o.gross_amount, o.fees, o.net_amount)
+              IS DISTINCT FROM (EXCLUDED.settlement_date, EXCLUDED.gross_amount,
+                                EXCLUDED.fees, EXCLUDED.net_amount)
+        RETURNING store_account_id, settlement_date, (xmax = 0) AS inserted
+    )
+    SELECT store_account_id, settlement_date,
+           COUNT(*) FILTER (WHERE inserted) AS new_orders,
+           COUNT(*) FILTER (WHERE NOT inserted) AS changed_orders
+    FROM (
+        SELECT store_account_id, settlement_date, inserted FROM written
+        UNION ALL
+        SELECT store_account_id, settlement_date, NULL FROM previous
+    ) days
+    GROUP BY store_account_id, settlement_date
+"""
+
+# Rebuilds income_data for the given store-days from the orders. Every key
+# gets a total, so a store-day left without orders deletes its derived row.
+# Only rows the order mode owns are written: days saved from daily summaries
+# (source 'summary') are kept and counted, never overwritten.
+DERIVE_INCOME_SQL = """
+    WITH days AS (
+        SELECT DISTINCT store_account_id, settlement_date
+        FROM unnest(%(store_account_ids)s::text[], %(dates)s::date[])
+             AS d(store_account_id, settlement_date)
+    ),
+    totals AS (
+        SELECT d.store_account_id, d.settlement_date,
+               COUNT(o.order_id) AS orders,
+               COALESCE(SUM(o.net_amount), 0) AS net_income
+        FROM days d
+        LEFT JOIN income_orders o
+          ON o.username = %(username)s
+         AND o.store_account_id = d.store_account_id
+         AND o.settlement_date = d.settlement_date
+        GROUP BY d.store_account_id, d.settlement_date
+    ),
+    removed AS (
+        DELETE FROM income_data i
+        USING totals t
+        WHERE i.username = %(username)s
+        AND i.store_account_id = t.store_account_id
+        AND i.date = t.settlement_date
+        AND i.source = 'orders'
+        AND t.orders = 0
+        RETURNING i.store_account_id
+    ),
+    upserted AS (
+        INSERT INTO income_data AS i
+        (UniqueID, username, Date, store_account_id,
+         store_name, Account_name, Net_income, source)
+        SELECT gen_random_uuid()::text, %(username)s, t.settlement_date,
+               t.store_account_id, e.Store_name, e.Account_name, t.net_income, 'orders'
+        FROM totals t
+        JOIN ecom_store e
+          ON e.username = %(username)s
+         AND e.Store_Account_ID = t.store_account_id
+        WHERE t.orders > 0
+        ON CONFLICT (username, store_account_id, date) DO UPDATE
+        SET Net_income = EXCLUDED.Net_income
+        WHERE i.source = 'orders'
+        AND i.Net_income IS DISTINCT FROM EXCLUDED.Net_income
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT
+        (SELECT COUNT(*) FROM totals) AS days,
+        (SELECT COUNT(*) FROM upserted WHERE inserted) AS inserted,
+        (SELECT COUNT(*) FROM upserted WHERE NOT inserted) AS updated,
+        (SELECT COUNT(*) FROM removed) AS removed,
+        (SELECT COUNT(*)
+         FROM income_data i
+         JOIN totals t
+           ON i.store_account_id = t.store_account_id
+          AND i.date = t.settlement_date
+         WHERE i.username = %(username)s
+         AND i.source <> 'orders') AS kept
+"""
+
+def combine_orders(processed_data):
+    """
+    Stack the order frames of processed files. An order repeated within the
+    upload keeps its copy from the last file, as daily summaries do, and the
+    number of dropped repeats is returned alongside the frame.
+    """
+    frames = [
+        processed_file['orders'].assign(store_account_id=processed_file['store_account_id'])
+        for processed_file in processed_data
+        if not processed_file['orders'].empty
+    ]
+    if not frames:
+        return pd.DataFrame(columns=['store_account_id', 'order_id']), 0
+    orders = pd.concat(frames, ignore_index=True)
+    unique = orders.drop_duplicates(subset=['store_account_id', 'order_id'], keep='last')
+    return unique, len(orders) - len(unique)
+
+def fetch_existing_orders(cur, username, store_account_id, order_ids,
+                          batch_size=ORDER_PROBE_BATCH_SIZE):
+    """Return the stored copies of order_ids already ingested for a store account"""
+    existing = []
+    for start in range(0, len(order_ids), batch_size):
+        cur.execute(EXISTING_ORDERS_SQL, (
+            username, store_account_id, order_ids[start:start + batch_size]
+        ))
+        existing.extend(cur.fetchall())
+    return pd.DataFrame(existing, columns=['order_id', 'settlement_date',
+                                           'gross_amount', 'net_amount'])
+
+def drop_ingested_orders(cur, username, orders):
+    """
+    Anti-join orders against the copies already in income_orders, per store
+    account, keeping new orders and orders whose date or amounts changed
+    """
+    keep = pd.Series(True, index=orders.index)
+    for store_account_id, store_orders in orders.groupby('store_account_id'):
+        existing = fetch_existing_orders(
+            cur, username, store_account_id, store_orders['order_id'].tolist()
+        )
+        if existing.empty:
+            continue
+        stored = store_orders[['order_id']].merge(existing, on='order_id', how='left')
+        stored.index = store_orders.index
+        # Amounts are compared to the cent, NUMERIC against parsed floats
+        same = (
+            (stored['settlement_date'] == store_orders['settlement_date'])
+            & (stored['gross_amount'].astype(float).round(2)
+               == store_orders['gross_amount'].astype(float).round(2))
+            & (stored['net_amount'].astype(float).round(2)
+               == store_orders['net_amount'].astype(float).round(2))
+        )
+        keep[store_orders.index] = ~same
+    return orders[keep]
+
+def write_orders_csv(orders):
+    """Serialize an order frame as CSV for COPY"""
+    buffer = StringIO()
+    csv.writer(buffer).writerows(zip(
+        orders['store_account_id'],
+        orders['order_id'],
+        orders['settlement_date'],
+        orders['gross_amount'],
+        orders['fees'],
+        orders['net_amount']
+    ))
+    buffer.seek(0)
+    return buffer
+
+def derive_income_days(cur, username, store_days):
+    """
+    Rebuild the income_data rows of (store_account_id, date) pairs from
+    income_orders and return day counts
+    """
+    cur.execute(DERIVE_INCOME_SQL, {
+        'store_account_ids': [store_account_id for store_account_id, _ in store_days],
+        'dates': [day for _, day in store_days],
+        'username': username
+    })
+    result = cur.fetchone()
+    changed = result['inserted'] + result['updated'] + result['removed']
+    return {
+        'inserted': result['inserted'],
+        'updated': result['updated'],
+        'removed': result['removed'],
+        'kept': result['kept'],
+        'unchanged': result['days'] - changed - result['kept']
+    }
+
+def load_orders(cur, username, processed_data):
+    """
+    Load new and changed orders into income_orders with COPY and derive the
+    income_data days they touch from the order table in SQL.
+    Orders whose stored copy is identical are skipped, so overlapping exports
+    never double count and re-uploads cost little more than the probes.
+    Returns order and day counts.
+    """
+    orders, repeated = combine_orders(processed_data)
+    received = len(orders)
+    if not orders.empty:
+        orders = drop_ingested_orders(cur, username, orders)
+
+    counts = {'orders': 0, 'changed': 0, 'duplicates': received, 'repeated': repeated,
+              'inserted': 0, 'updated': 0, 'removed': 0, 'kept': 0, 'unchanged': 0}
+    if orders.empty:
+        return counts
+
+    cur.execute(STAGING_DDL)
+    cur.copy_expert(STAGING_COPY_SQL, write_orders_csv(orders))
+
+    cur.execute(ORDERS_UPSERT_SQL, {'username': username})
+    days = cur.fetchall()
+    loaded = sum(day['new_orders'] for day in days)
+    changed = sum(day['changed_orders'] for day in days)
+
+    counts.update(derive_income_days(
+        cur, username, [(day['store_account_id'], day['settlement_date']) for day in days]
+    ))
+    counts.update({
+        'orders': loaded,
+        'changed': changed,
+        'duplicates': received - loaded - changed
+    })
+    return counts
@@ -0,0 +1,34 @@
+"""Keyset pagination for the newest-first data tables.
+
+A page is the page_size rows that sort after the key of the last row shown,
+so every page is an index range scan with a LIMIT however deep the user
+scrolls, instead of an OFFSET that reads and discards all earlier rows.
+"""
+
+PAGE_SIZES = [50, 100, 250, 500]
+
+def keyset_page_query(select, conditions, params, key_columns, after=None, page_size=PAGE_SIZES[0]):
+    """
+    Newest-first page query and params over key_columns, continuing after
+    the key tuple of the previous page's last row. One extra row is fetched
+    so the caller can tell whether another page follows.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    if after is not None:
+        placeholders = ', '.join(['%s'] * len(key_columns))
+        conditions.append(f"({', '.join(key_columns)}) < ({placeholders})")
+        params.extend(after)
+    order = ', '.join(f"{column} DESC" for column in key_columns)
+    query = f"{select} WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT %s"
+    params.append(page_size + 1)
+    return query, params
+
+def estimate_rows(cur, table, conditions, params):
+    """Planner row estimate for the filtered table, without counting every row"""
+    cur.execute(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {' AND '.join(conditions)}",
+        params
+    )
+    plan = cur.fetchone()['QUERY PLAN']
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,81 @@
+import hashlib
+import os
+import threading
+import pandas as pd
+from parsers import PARSER_VERSION
+
+# Parsed summaries live next to the app unless configured otherwise
+CACHE_DIR = os.environ.get(
+    'PARSE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parse_cache')
+)
+MAX_ENTRIES = 500
+MAX_BYTES = 64 * 1024 * 1024  # 64MB of Parquet files
+
+class ParseCache:
+    """On-disk Parquet cache of parsed Date/Net_income summaries with LRU eviction"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, data, store_type, version=PARSER_VERSION):
+        """Build the cache key from the parser version, marketplace type and file bytes"""
+        return f"v{version}-{store_type}-{hashlib.sha256(data).hexdigest()}"
+
+    def path_for(self, key):
+        """Return the Parquet path for a cache key"""
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def get(self, key):
+        """Return the cached summary for key, or None on a miss"""
+        path = self.path_for(key)
+        try:
+            summary = pd.read_parquet(path)
+            # Mark as recently used for eviction
+            os.utime(path)
+            return summary
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Unreadable entry, drop it and parse again
+            self.remove(path)
+            return None
+
+    def put(self, key, summary):
+        """Store a summary under key and evict the least recently used entries"""
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            summary.to_parquet(temp_path, index=False)
+            os.replace(temp_path, path)
+        finally:
+            self.remove(temp_path)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries beyond the count and size limits"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.parquet'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self.remove(path)
+            total_bytes -= size
+
+    def remove(self, path):
+        """Delete a file if it still exists"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
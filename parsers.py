@@ -0,0 +1,317 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+import pandas as pd
+from openpyxl import load_workbook
+from date_parsing import DateNormalizer
+
+# Part of every parse cache key. Bump it whenever parser output changes, so
+# summaries cached by an older parser are parsed again instead of served.
+PARSER_VERSION = 2
+
+# Rows searched for a header before a sheet is rejected
+HEADER_SCAN_ROWS = 50
+
+# Rows materialized per DataFrame when streaming a sheet
+STREAM_CHUNK_ROWS = 10000
+
+# Tokopedia commission rows that make up the daily net income
+TOKOPEDIA_SERVICE_FEE = 'Biaya Layanan Power Merchant'
+TOKOPEDIA_FREE_SHIPPING_FEE = 'Biaya Layanan Bebas Ongkir Power Merchant'
+
+# Order-level frame written to income_orders
+ORDER_COLUMNS = ['order_id', 'settlement_date', 'gross_amount', 'fees', 'net_amount']
+
+def empty_summary():
+    """Return an empty daily summary frame"""
+    return pd.DataFrame(columns=['Date', 'Net_income'])
+
+def find_header(rows, marker, scan_rows=HEADER_SCAN_ROWS):
+    """Consume rows up to and including the first one with a cell containing marker"""
+    for index, row in enumerate(rows):
+        if index >= scan_rows:
+            break
+        if any(cell is not None and marker in str(cell) for cell in row):
+            return row
+    raise ValueError(f"No '{marker}' header row found in the first {scan_rows} rows")
+
+def iter_sheet_chunks(excel_file, sheet_name, columns, header_marker,
+                      chunk_rows=STREAM_CHUNK_ROWS, header_scan_rows=HEADER_SCAN_ROWS):
+    """
+    Stream a sheet in read-only mode and yield DataFrames holding only columns,
+    at most chunk_rows rows each
+    """
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else None
+                  for cell in find_header(rows, header_marker, header_scan_rows)]
+
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f"Missing columns in {sheet_name} sheet: {', '.join(missing)}")
+        positions = [header.index(column) for column in columns]
+
+        buffer = []
+        for row in rows:
+            buffer.append([row[i] if i < len(row) else None for i in positions])
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+class MarketplaceParser:
+    """
+    Declarative description of a marketplace export.
+
+    sheet_name and header_marker locate the data, columns lists every column
+    the parser needs (nothing else is read), date_column holds the settlement
+    day and date_format is the format the export writes it in, row_filter
+    optionally keeps a subset of rows and aggregate(chunk, dates) returns the
+    net income per day of a chunk. Text dates that do not match date_format
+    fall back to format detection.
+
+    For order-level ingestion, order_id_column identifies the order,
+    order_columns lists the extra columns it reads and order_amounts(chunk)
+    returns gross_amount and net_amount for every row of a chunk.
+    """
+
+    def __init__(self, name, sheet_name, header_marker, columns, date_column,
+                 aggregate, date_format=None, row_filter=None,
+                 order_id_column=None, order_columns=(), order_amounts=None):
+        self.name = name
+        self.sheet_name = sheet_name
+        self.header_marker = header_marker
+        self.columns = columns
+        self.date_column = date_column
+        self.aggregate = aggregate
+        self.date_format = date_format
+        self.row_filter = row_filter
+        self.order_id_column = order_id_column
+        self.order_columns = list(order_columns)
+        self.order_amounts = order_amounts
+
+    def parse(self, excel_file, chunk_rows=STREAM_CHUNK_ROWS):
+        """Stream the export and return its Date/Net_income summary"""
+        chunks = iter_sheet_chunks(excel_file, self.sheet_name, self.columns,
+                                   self.header_marker, chunk_rows=chunk_rows)
+        return self.summarize(chunks)
+
+    def summarize(self, chunks):
+        """Aggregate DataFrame chunks into a Date/Net_income summary"""
+        totals = None
+        dates = DateNormalizer()
+        for chunk in chunks:
+            if self.row_filter is not None:
+                chunk = chunk[self.row_filter(chunk)]
+            if chunk.empty:
+                continue
+
+            daily = self.aggregate(chunk, self.parse_dates(chunk, dates))
+            totals = daily if totals is None else totals.add(daily, fill_value=0)
+
+        if totals is None or totals.empty:
+            return empty_summary()
+
+        totals = totals.sort_index()
+        return pd.DataFrame({'Date': totals.index, 'Net_income': totals.values})
+
+    def parse_dates(self, chunk, dates):
+        """Parse the settlement column of a chunk into dates with the file's normalizer"""
+        return dates.parse(
+            chunk[self.date_column],
+            key=(self.name, self.date_column),
+            hint=self.date_format
+        ).dt.date
+
+    def parse_orders(self, excel_file, chunk_rows=STREAM_CHUNK_ROWS):
+        """Stream the export and return one row per order"""
+        if self.order_id_column is None:
+            raise ValueError(f"{self.name} exports have no order-level mapping")
+
+        columns = list(dict.fromkeys(
+            self.columns + [self.order_id_column] + self.order_columns
+        ))
+        chunks = iter_sheet_chunks(excel_file, self.sheet_name, columns,
+                                   self.header_marker, chunk_rows=chunk_rows)
+
+        parts = []
+        dates = DateNormalizer()
+        for chunk in chunks:
+            if self.row_filter is not None:
+                chunk = chunk[self.row_filter(chunk)]
+            chunk = chunk[chunk[self.order_id_column].notna()]
+            if chunk.empty:
+                continue
+
+            amounts = self.order_amounts(chunk)
+            parts.append(pd.DataFrame({
+                'order_id': chunk[self.order_id_column].astype(str).str.strip(),
+                'settlement_date': self.parse_dates(chunk, dates),
+                'gross_amount': amounts['gross_amount'].fillna(0),
+                'net_amount': amounts['net_amount'].fillna(0)
+            }).dropna(subset=['settlement_date']))
+
+        if not parts:
+            return empty_orders()
+
+        # An order can span several rows, and several chunks
+        orders = pd.concat(parts, ignore_index=True).groupby('order_id', as_index=False).agg(
+            settlement_date=('settlement_date', 'max'),
+            gross_amount=('gross_amount', 'sum'),
+            net_amount=('net_amount', 'sum')
+        )
+        orders['fees'] = orders['gross_amount'] - orders['net_amount']
+        return orders[ORDER_COLUMNS]
+
+def empty_orders():
+    """Return an empty order-level frame"""
+    return pd.DataFrame(columns=ORDER_COLUMNS)
+
+def summarize_orders(orders):
+    """Derive the Date/Net_income summary from order-level rows"""
+    if orders.empty:
+        return empty_summary()
+    totals = orders.groupby('settlement_date')['net_amount'].sum()
+    return pd.DataFrame({'Date': totals.index, 'Net_income': totals.values})
+
+def column_amounts(gross_column, net_column):
+    """Build an order_amounts function reading gross and net straight from columns"""
+    def order_amounts(chunk):
+        return pd.DataFrame({
+            'gross_amount': pd.to_numeric(chunk[gross_column], errors='coerce'),
+            'net_amount': pd.to_numeric(chunk[net_column], errors='coerce')
+        })
+    return order_amounts
+
+def tokopedia_order_amounts(chunk):
+    """Product amount on service fee rows, minus the fee of every commission row"""
+    is_service_fee = chunk['Commission Name'] == TOKOPEDIA_SERVICE_FEE
+    gross = pd.to_numeric(chunk['Total Product Amount'], errors='coerce').fillna(0).where(is_service_fee, 0)
+    fee = pd.to_numeric(chunk['Service Fee Gross'], errors='coerce').fillna(0)
+    return pd.DataFrame({'gross_amount': gross, 'net_amount': gross - fee})
+
+def daily_sum(amount_column):
+    """Build an aggregation that sums amount_column per day"""
+    def aggregate(chunk, dates):
+        return pd.to_numeric(chunk[amount_column], errors='coerce').groupby(dates).sum()
+    return aggregate
+
+def tokopedia_net_income(chunk, dates):
+    """Product amount minus service and free-shipping fees per day"""
+    commission_names = [TOKOPEDIA_SERVICE_FEE, TOKOPEDIA_FREE_SHIPPING_FEE]
+    amounts = pd.DataFrame({
+        'Total Product Amount': pd.to_numeric(chunk['Total Product Amount'], errors='coerce'),
+        'Service Fee Gross': pd.to_numeric(chunk['Service Fee Gross'], errors='coerce')
+    })
+
+    # One grouped pass gives gross and both fees for every date
+    sums = (
+        amounts.groupby([dates, chunk['Commission Name']])
+        .sum()
+        .unstack(-1, fill_value=0)
+        .reindex(
+            columns=pd.MultiIndex.from_product([
+                ['Total Product Amount', 'Service Fee Gross'],
+                commission_names
+            ]),
+            fill_value=0
+        )
+    )
+
+    gross = sums[('Total Product Amount', TOKOPEDIA_SERVICE_FEE)]
+    service_fee = sums[('Service Fee Gross', TOKOPEDIA_SERVICE_FEE)]
+    free_shipping_fee = sums[('Service Fee Gross', TOKOPEDIA_FREE_SHIPPING_FEE)]
+    return gross - service_fee - free_shipping_fee
+
+# Registered marketplaces, keyed by lower-cased store name
+MARKETPLACES = {}
+
+def register_marketplace(parser):
+    """Add a marketplace parser to the registry"""
+    MARKETPLACES[parser.name] = parser
+    return parser
+
+register_marketplace(MarketplaceParser(
+    name='shopee',
+    sheet_name='Income',
+    header_marker='No. Pesanan',
+    columns=['Tanggal Dana Dilepaskan', 'Total Penghasilan'],
+    date_column='Tanggal Dana Dilepaskan',
+    date_format='%Y-%m-%d',
+    aggregate=daily_sum('Total Penghasilan'),
+    order_id_column='No. Pesanan',
+    order_columns=['Harga Asli Produk'],
+    order_amounts=column_amounts('Harga Asli Produk', 'Total Penghasilan')
+))
+
+register_marketplace(MarketplaceParser(
+    name='tokopedia',
+    sheet_name='Commission Report',
+    header_marker='Commission Name',
+    columns=['Commission Name', 'Finish Date', 'Total Product Amount', 'Service Fee Gross'],
+    date_column='Finish Date',
+    date_format='%Y-%m-%d %H:%M:%S',
+    aggregate=tokopedia_net_income,
+    row_filter=lambda chunk: chunk['Commission Name'].isin(
+        [TOKOPEDIA_SERVICE_FEE, TOKOPEDIA_FREE_SHIPPING_FEE]
+    ),
+    order_id_column='Invoice',
+    order_amounts=tokopedia_order_amounts
+))
+
+register_marketplace(MarketplaceParser(
+    name='tiktok',
+    sheet_name='Order details',
+    header_marker='Order settled time(UTC)',
+    columns=['Order settled time(UTC)', 'Total settlement amount'],
+    date_column='Order settled time(UTC)',
+    date_format='%Y/%m/%d',
+    aggregate=daily_sum('Total settlement amount'),
+    order_id_column='Order/adjustment ID',
+    order_columns=['Total revenue'],
+    order_amounts=column_amounts('Total revenue', 'Total settlement amount')
+))
+
+def summarize_tokopedia_commissions(df):
+    """Summarize Tokopedia Commission Report rows into daily net income"""
+    return MARKETPLACES['tokopedia'].summarize([df])
+
+def parse_marketplace_file(store_type, excel_file, chunk_rows=STREAM_CHUNK_ROWS):
+    """Parse an export with the parser registered for store_type"""
+    return MARKETPLACES[store_type].parse(excel_file, chunk_rows=chunk_rows)
+
+def parse_workbook(store_type, data, orders=False):
+    """Parse workbook bytes into a daily summary, or into order rows when orders is set"""
+    if orders:
+        return MARKETPLACES[store_type].parse_orders(BytesIO(data))
+    return parse_marketplace_file(store_type, BytesIO(data))
+
+def parse_workbooks_parallel(jobs, max_workers=None, on_progress=None):
+    """
+    Parse (store_type, bytes[, orders]) jobs in worker processes.
+    Returns (summary, error) pairs in job order; on_progress(index, completed)
+    is called in the calling process as each job finishes.
+    """
+    results = [None] * len(jobs)
+    if not jobs:
+        return results
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(parse_workbook, *job): index
+            for index, job in enumerate(jobs)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index] = (future.result(), None)
+            except Exception as e:
+                results[index] = (empty_summary(), e)
+            if on_progress:
+                on_progress(index, completed)
+    return results
@@ -0,0 +1,135 @@
+import calendar
+from datetime import date, datetime, timedelta
+
+# Half-open range predicate on a date column; bind Period.start and Period.end
+PERIOD_PREDICATE = "{column} >= %s AND {column} < %s"
+
+def period_predicate(column='date'):
+    """Return the SQL range predicate for a period on column"""
+    return PERIOD_PREDICATE.format(column=column)
+
+def as_date(value):
+    """Normalize datetimes and pandas timestamps to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def shift_months(day, months):
+    """Move a date by whole months, clamping to the last day of the target month"""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+def quarter_of(day):
+    """Return the quarter (1-4) a date falls in"""
+    return (day.month - 1) // 3 + 1
+
+class Period:
+    """
+    Half-open date range [start, end).
+
+    Report queries filter with period_predicate() and bind start and end, so
+    every period is an index range scan on date instead of an EXTRACT() per row.
+    """
+
+    def __init__(self, start, end, kind='custom', label=None):
+        start, end = as_date(start), as_date(end)
+        if end < start:
+            raise ValueError(f"Period end {end} is before its start {start}")
+        self.start = start
+        self.end = end
+        self.kind = kind
+        self.label = label or f"{start:%Y-%m-%d} to {end - timedelta(days=1):%Y-%m-%d}"
+
+    @classmethod
+    def day(cls, day):
+        day = as_date(day)
+        return cls(day, day + timedelta(days=1), 'day', f"{day:%d %B %Y}")
+
+    @classmethod
+    def week(cls, day):
+        """ISO week (Monday to Sunday) containing day"""
+        start = as_date(day) - timedelta(days=as_date(day).weekday())
+        return cls(start, start + timedelta(days=7), 'week',
+                   f"Week {start.isocalendar()[1]} {start.isocalendar()[0]}")
+
+    @classmethod
+    def month(cls, year, month):
+        start = date(year, month, 1)
+        return cls(start, shift_months(start, 1), 'month', f"{calendar.month_name[month]} {year}")
+
+    @classmethod
+    def quarter(cls, year, quarter):
+        start = date(year, (quarter - 1) * 3 + 1, 1)
+        return cls(start, shift_months(start, 3), 'quarter', f"Q{quarter} {year}")
+
+    @classmethod
+    def year(cls, year):
+        return cls(date(year, 1, 1), date(year + 1, 1, 1), 'year', str(year))
+
+    @classmethod
+    def custom(cls, first_day, last_day):
+        """Inclusive first and last day, as picked in date inputs"""
+        return cls(as_date(first_day), as_date(last_day) + timedelta(days=1))
+
+    @classmethod
+    def month_to_date(cls, day):
+        """From the first of day's month through day"""
+        day = as_date(day)
+        return cls(day.replace(day=1), day + timedelta(days=1), 'month_to_date',
+                   f"{calendar.month_name[day.month]} {day.year}")
+
+    def previous(self):
+        """The period of the same kind just before this one"""
+        if self.kind == 'day':
+            return Period.day(self.start - timedelta(days=1))
+        if self.kind == 'week':
+            return Period.week(self.start - timedelta(days=7))
+        if self.kind == 'month':
+            start = shift_months(self.start, -1)
+            return Period.month(start.year, start.month)
+        if self.kind == 'quarter':
+            start = shift_months(self.start, -3)
+            return Period.quarter(start.year, quarter_of(start))
+        if self.kind == 'year':
+            return Period.year(self.start.year - 1)
+        if self.kind == 'month_to_date':
+            return Period.month_to_date(shift_months(self.end - timedelta(days=1), -1))
+        return Period(self.start - (self.end - self.start), self.start)
+
+    def clipped(self, days):
+        """The first days days of this period, or all of it if shorter"""
+        return Period(self.start, min(self.start + timedelta(days=days), self.end), 'custom', self.label)
+
+    def params(self):
+        """Bind values for period_predicate()"""
+        return (self.start, self.end)
+
+    def contains(self, day):
+        return self.start <= as_date(day) < self.end
+
+    def __eq__(self, other):
+        return isinstance(other, Period) and (self.start, self.end) == (other.start, other.end)
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    def __repr__(self):
+        return f"Period({self.start!r}, {self.end!r}, kind={self.kind!r})"
+
+def month_comparison(main_month, comp_month, today):
+    """
+    Periods comparing the month of main_month with the month of comp_month.
+
+    A main month still in progress is compared month-to-date, against the
+    same number of days at the start of the comparison month. today is passed
+    in, so the caller decides which clock it follows.
+    """
+    today = as_date(today)
+    main_month, comp_month = as_date(main_month), as_date(comp_month)
+    main = Period.month(main_month.year, main_month.month)
+    comp = Period.month(comp_month.year, comp_month.month)
+    if main.contains(today):
+        return Period.month_to_date(today), comp.clipped(today.day)
+    return main, comp
@@ -0,0 +1,140 @@
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from database import get_db_cursor
+
+MAX_ENTRIES = 512
+TTL_SECONDS = 600
+# How long a user's database data version is trusted before it is read again
+VERSION_CHECK_SECONDS = 2
+
+# Stamped by triggers on every write to income_data and imp_gs_admininput
+DATA_VERSION_SQL = """
+    SELECT version
+    FROM report_data_version
+    WHERE username = %s
+"""
+
+def fetch_data_version(username):
+    """Return the database's data version of username, 0 before any write"""
+    with get_db_cursor() as cur:
+        cur.execute(DATA_VERSION_SQL, (username,))
+        row = cur.fetchone()
+        return row['version'] if row else 0
+
+def freeze(value):
+    """Turn lists, sets and dicts in query parameters into hashable tuples"""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(freeze(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    return value
+
+class ReportCache:
+    """
+    In-memory LRU cache of report query results, shared by all sessions.
+
+    Keys are (username, data version, query name, parameters), so one user
+    never sees another user's rows. The data version pairs the database's
+    stamp, which triggers bump on every write from any writer (the app, the
+    ingest CLI, admin input loads), with a local counter that bump(username)
+    moves right after this process writes. Old entries age out of the LRU.
+    The database stamp is read at most once per check_interval per user.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS,
+                 version_source=fetch_data_version, check_interval=VERSION_CHECK_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_source = version_source
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.stored_versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, username):
+        """Return (database version, local version) of username"""
+        now = time.monotonic()
+        with self.lock:
+            checked = self.stored_versions.get(username)
+        if checked is None or now - checked[0] > self.check_interval:
+            checked = (now, self.version_source(username))
+            with self.lock:
+                self.stored_versions[username] = checked
+        with self.lock:
+            return checked[1], self.versions.get(username, 0)
+
+    def bump(self, username):
+        """Invalidate every cached result of username"""
+        with self.lock:
+            self.versions[username] = self.versions.get(username, 0) + 1
+            # Read the database stamp again on the next lookup
+            self.stored_versions.pop(username, None)
+
+    def make_key(self, username, name, params):
+        return (username, self.version(username), name, freeze(params))
+
+    def get(self, key):
+        """Return (True, copy of the value) for a fresh entry, (False, None) otherwise"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return False, None
+        # Callers may modify what they get back, the cached value stays intact
+        return True, copy.deepcopy(value)
+
+    def put(self, key, value):
+        """Store value under key and evict the least recently used entries"""
+        with self.lock:
+            self.entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_compute(self, username, name, params, compute):
+        """Return the cached result of compute(), running it on a miss; errors are not cached"""
+        key = self.make_key(username, name, params)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+report_cache = ReportCache()
+
+def cached_report(func):
+    """Cache func(username, *args, **kwargs) per user and data version"""
+    @functools.wraps(func)
+    def wrapper(username, *args, **kwargs):
+        return report_cache.get_or_compute(
+            username, func.__qualname__, (args, kwargs),
+            lambda: func(username, *args, **kwargs)
+        )
+    return wrapper
+
+def invalidate_user(username):
+    """Drop username's cached report results after a write"""
+    report_cache.bump(username)
@@ -0,0 +1,111 @@
+import pandas as pd
+from rollups import INCOME_METRIC
+
+# Column kinds; columns without a kind (labels, dates) are passed through as is
+CURRENCY = 'currency'
+COUNT = 'count'
+PERCENT = 'percent'
+
+FORMATTERS = {
+    CURRENCY: lambda x: f"Rp{x:,.0f}",
+    COUNT: lambda x: f"{x:,.0f}",
+    PERCENT: lambda x: f"{x:,.2f}%",
+}
+
+# Percent columns hold 12.34 for 12.34%, so Excel shows them without scaling
+EXCEL_FORMATS = {
+    CURRENCY: 'Rp#,##0',
+    COUNT: '#,##0',
+    PERCENT: '0.00"%"',
+}
+
+def metric_kind(metric):
+    """Money metrics are currency, admin input counts are counts"""
+    return CURRENCY if metric in (INCOME_METRIC, 'Penjualan') else COUNT
+
+def format_value(value, kind):
+    """Format one number for display, leaving blanks blank"""
+    if value is None or pd.isna(value):
+        return ''
+    return FORMATTERS[kind](value)
+
+class ReportFrame:
+    """
+    Report table with numeric columns and the kind of each one.
+
+    Data functions return ReportFrames and never format; formatted(),
+    to_excel() and the PDF and chart builders turn them into text at the
+    boundary. changes maps a percent column to the (current, previous)
+    columns it compares, so totals can recompute it instead of summing it.
+    """
+
+    def __init__(self, df, kinds, changes=None, label_column=None):
+        self.df = df.copy()
+        self.kinds = {column: kind for column, kind in kinds.items() if column in df.columns}
+        self.changes = dict(changes or {})
+        if label_column is None and len(df.columns):
+            label_column = df.columns[0]
+        self.label_column = label_column
+        for column, kind in self.kinds.items():
+            self.df[column] = pd.to_numeric(self.df[column]).astype(float)
+
+    @classmethod
+    def empty_frame(cls):
+        return cls(pd.DataFrame(), {})
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    @property
+    def columns(self):
+        return self.df.columns
+
+    def __len__(self):
+        return len(self.df)
+
+    def rename(self, columns):
+        """Rename columns, carrying their kinds and change pairs along"""
+        rename = lambda column: columns.get(column, column)
+        return ReportFrame(
+            self.df.rename(columns=columns),
+            {rename(column): kind for column, kind in self.kinds.items()},
+            {rename(column): (rename(current), rename(previous))
+             for column, (current, previous) in self.changes.items()},
+            rename(self.label_column)
+        )
+
+    def with_total(self, label='Total'):
+        """Append a total row: sums of amounts, percents recomputed from the summed pair"""
+        if self.empty:
+            return self
+        totals = {self.label_column: label}
+        for column, kind in self.kinds.items():
+            if kind != PERCENT:
+                totals[column] = self.df[column].sum()
+        for column, (current, previous) in self.changes.items():
+            base = totals.get(previous, 0)
+            totals[column] = (totals[current] - base) / base * 100 if base else 0.0
+        df = pd.concat([self.df, pd.DataFrame([totals])], ignore_index=True)
+        return ReportFrame(df, self.kinds, self.changes, self.label_column)
+
+    def formatted(self):
+        """Copy of the table with every typed column rendered as text"""
+        df = self.df.copy()
+        for column, kind in self.kinds.items():
+            df[column] = [format_value(value, kind) for value in df[column]]
+        return df
+
+    def rows(self):
+        """Header plus formatted rows, as PDF tables take them"""
+        df = self.formatted()
+        return [df.columns.tolist()] + df.values.tolist()
+
+    def to_excel(self, writer, sheet_name, width=18):
+        """Write the numbers to an xlsxwriter sheet with a number format per kind"""
+        self.df.to_excel(writer, sheet_name=sheet_name, index=False)
+        worksheet = writer.sheets[sheet_name]
+        for index, column in enumerate(self.df.columns):
+            kind = self.kinds.get(column)
+            cell_format = writer.book.add_format({'num_format': EXCEL_FORMATS[kind]}) if kind else None
+            worksheet.set_column(index, index, width, cell_format)
@@ -0,0 +1,227 @@
+"""Report query builders.
+
+Each builder returns the SQL and params a report runs. reports.py executes
+them, and `migrations.py explain` plans the very same statements, so the
+plans it prints are the access paths the reports actually take.
+"""
+from datetime import timedelta
+from pagination import PAGE_SIZES, keyset_page_query
+from periods import Period, period_predicate, shift_months
+from rollups import INCOME_METRIC
+
+# Admin input types shown in the overview and current month reports
+ADMIN_TYPES = ['Pengunjung', 'Penjualan', 'Pesanan']
+
+# Figures of one store and metric that the current month report compares
+CURRENT_MONTH_FIGURES = ['month_current', 'month_previous', 'today', 'yesterday',
+                         'same_day_last_month']
+
+def total_income_query(username, period):
+    """Query and params of the daily income total across all stores"""
+    return f"""
+        SELECT
+            date,
+            SUM(net_income) as net_income
+        FROM income_data
+        WHERE username = %s
+        AND {period_predicate()}
+        GROUP BY date
+        ORDER BY date
+    """, (username, *period.params())
+
+def store_income_query(username, period, selected_store_ids=None):
+    """Query and params of daily income per store, optionally for some stores only"""
+    if selected_store_ids:
+        return f"""
+            SELECT
+                date,
+                store_account_id,
+                SUM(net_income) as net_income
+            FROM income_data
+            WHERE username = %s
+            AND {period_predicate()}
+            AND store_account_id = ANY(%s)
+            GROUP BY date, store_account_id
+            ORDER BY date, store_account_id
+        """, (username, *period.params(), list(selected_store_ids))
+    return f"""
+        SELECT
+            date,
+            store_account_id,
+            SUM(net_income) as net_income
+        FROM income_data
+        WHERE username = %s
+        AND {period_predicate()}
+        GROUP BY date, store_account_id
+        ORDER BY date, store_account_id
+    """, (username, *period.params())
+
+def admin_data_query(username, data_type, period, selected_stores=None):
+    """Query and params of admin input values of one type, optionally for some stores only"""
+    if selected_stores:
+        return f"""
+            SELECT
+                date,
+                store_account_id,
+                value
+            FROM imp_gs_admininput
+            WHERE username = %s
+            AND type = %s
+            AND {period_predicate()}
+            AND store_account_id = ANY(%s)
+            GROUP BY date, store_account_id, value
+            ORDER BY date, store_account_id
+        """, (username, data_type, *period.params(), list(selected_stores))
+    return f"""
+        SELECT
+            date,
+            store_account_id,
+            value
+        FROM imp_gs_admininput
+        WHERE username = %s
+        AND type = %s
+        AND {period_predicate()}
+        GROUP BY date, store_account_id, value
+        ORDER BY date, store_account_id
+    """, (username, data_type, *period.params())
+
+def current_month_periods(today):
+    """Periods behind CURRENT_MONTH_FIGURES, in the same order"""
+    month = Period.month_to_date(today)
+    return [
+        month,
+        month.previous(),
+        Period.day(today),
+        Period.day(today).previous(),
+        Period.day(shift_months(month.end - timedelta(days=1), -1)),
+    ]
+
+def current_month_queries(username, today):
+    """
+    Queries and params of the current month report, one scan per table over
+    the span of all compared periods with a SUM() FILTER column per figure
+    """
+    periods = current_month_periods(today)
+    scan_start = min(period.start for period in periods)
+    scan_end = max(period.end for period in periods)
+
+    figures = ',\n'.join(
+        f"SUM({{value}}::float) FILTER (WHERE {period_predicate()}) AS {name}"
+        for name in CURRENT_MONTH_FIGURES
+    )
+    figure_params = [bound for period in periods for bound in period.params()]
+
+    return {
+        'income': (f"""
+            SELECT %s AS metric, store_account_id,
+                {figures.format(value='net_income')}
+            FROM income_data
+            WHERE username = %s
+            AND {period_predicate()}
+            GROUP BY store_account_id
+        """, (INCOME_METRIC, *figure_params, username, scan_start, scan_end)),
+        'admin input': (f"""
+            SELECT type AS metric, store_account_id,
+                {figures.format(value='value')}
+            FROM imp_gs_admininput
+            WHERE username = %s
+            AND type = ANY(%s)
+            AND {period_predicate()}
+            GROUP BY type, store_account_id
+        """, (*figure_params, username, ADMIN_TYPES, scan_start, scan_end)),
+    }
+
+def today_income_query(username, today, comparison):
+    """Query and params of income per store on the today period against a comparison period"""
+    return f"""
+        WITH today_data AS (
+            SELECT
+                store_account_id,
+                store_name,
+                account_name,
+                SUM(net_income) as today_income
+            FROM income_data
+            WHERE username = %s
+            AND {period_predicate()}
+            GROUP BY store_account_id, store_name, account_name
+        ),
+        last_month_data AS (
+            SELECT
+                store_account_id,
+                store_name,
+                account_name,
+                SUM(net_income) as last_month_income
+            FROM income_data
+            WHERE username = %s
+            AND {period_predicate()}
+            GROUP BY store_account_id, store_name, account_name
+        )
+        SELECT
+            COALESCE(t.store_account_id, l.store_account_id) as "Store ID",
+            COALESCE(t.store_name, l.store_name) as "Store",
+            COALESCE(t.account_name, l.account_name) as "Account",
+            COALESCE(t.today_income, 0) as today_income,
+            COALESCE(l.last_month_income, 0) as last_month_income,
+            COALESCE(t.today_income, 0) - COALESCE(l.last_month_income, 0) as "Diff_IDR",
+            CASE
+                WHEN COALESCE(l.last_month_income, 0) = 0 THEN 0
+                ELSE ROUND(((COALESCE(t.today_income, 0) - COALESCE(l.last_month_income, 0)) * 100.0 /
+                      NULLIF(COALESCE(l.last_month_income, 0), 0))::numeric, 2)
+            END as "Diff_%"
+        FROM today_data t
+        FULL OUTER JOIN last_month_data l
+            ON t.store_account_id = l.store_account_id
+        ORDER BY "Store", "Account"
+    """, (username, *today.params(), username, *comparison.params())
+
+def income_page_filters(username, store_account_id=None, period=None):
+    """Conditions and params of the Income Data table filters"""
+    conditions = ["username = %s"]
+    params = [username]
+    if store_account_id is not None:
+        conditions.append("store_account_id = %s")
+        params.append(store_account_id)
+    if period is not None:
+        conditions.append(period_predicate())
+        params.extend(period.params())
+    return conditions, params
+
+def income_page_query(conditions, params, after=None, page_size=PAGE_SIZES[0]):
+    """Keyset page of income rows, newest first on (date, store_account_id)"""
+    return keyset_page_query("""
+        SELECT
+            date as "Date",
+            store_account_id as "Store Account ID",
+            net_income as "Net Income"
+        FROM income_data
+    """, conditions, params, ['date', 'store_account_id'], after, page_size)
+
+def admin_page_filters(username, store_account_id=None, data_type=None, period=None):
+    """Conditions and params of the Admin Input table filters"""
+    conditions = ["username = %s"]
+    params = [username]
+    if store_account_id is not None:
+        conditions.append("store_account_id = %s")
+        params.append(store_account_id)
+    if data_type is not None:
+        conditions.append("type = %s")
+        params.append(data_type)
+    if period is not None:
+        conditions.append(period_predicate())
+        params.extend(period.params())
+    return conditions, params
+
+def admin_page_query(conditions, params, after=None, page_size=PAGE_SIZES[0]):
+    """
+    Keyset page of admin input rows, newest first on (date, store_account_id,
+    type, UniqueID). UniqueID breaks ties, since several rows can share the rest.
+    """
+    return keyset_page_query("""
+        SELECT
+            date as "Date",
+            store_account_id as "Store Account ID",
+            type as "Type",
+            value as "Value",
+            UniqueID as "UniqueID"
+        FROM imp_gs_admininput
+    """, conditions, params, ['date', 'store_account_id', 'type', 'UniqueID'], after, page_size)
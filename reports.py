@@ -1,7 +1,17 @@
 import traceback
 import streamlit as st
 import pandas as pd
-from database import get_db_cursor
+from database import (DEBUG_DIAGNOSTICS, LONG_STATEMENT_TIMEOUT_MS, TILE_STATEMENT_TIMEOUT_MS,
+                      database_today, fetch_dataframe, get_db_cursor, run_query_batch)
+from loader import ConcurrentLoader
+from report_cache import cached_report, report_cache
+from report_frames import CURRENCY, PERCENT, ReportFrame, format_value, metric_kind
+from pagination import PAGE_SIZES, estimate_rows
+from report_queries import (ADMIN_TYPES, CURRENT_MONTH_FIGURES, admin_data_query,
+                            admin_page_filters, admin_page_query, current_month_queries,
+                            income_page_filters, income_page_query, store_income_query,
+                            today_income_query, total_income_query)
+from comparison import compare_columns, compare_period_pairs, compare_periods
 from datetime import datetime, timedelta
 import plotly.express as px
 from io import BytesIO
@@ -18,6 +28,8 @@ import tempfile
 import calendar
 from datetime import datetime, timedelta
 import plotly.io as pio
+from periods import Period, month_comparison, period_predicate, quarter_of, shift_months
+from rollups import INCOME_METRIC
 from functools import lru_cache
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -29,46 +41,64 @@ import plotly.io as pio
 
 class ReportGenerator:
     def __init__(self):
+        self.current_date = None
         self.setup_session_state()
 
+    def today(self):
+        """
+        The database's CURRENT_DATE, read once per run so every report on the
+        page uses the same "today", on the same clock as the stored dates
+        """
+        if self.current_date is None:
+            self.current_date = database_today()
+        return self.current_date
+
     def setup_session_state(self):
         if 'report_start_date' not in st.session_state:
             st.session_state.report_start_date = None
         if 'report_end_date' not in st.session_state:
             st.session_state.report_end_date = None
 
-    @st.cache_data(ttl=3600)  # Cache for 1 hour
-    def get_available_date_range(_self):
+    def get_available_date_range(self):
         """Get the available date range from income_data"""
         try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    SELECT MIN(date) as min_date, MAX(date) as max_date 
-                    FROM income_data 
-                    WHERE username = %s
-                """, (st.session_state.username,))
-                result = cur.fetchone()
-                return result['min_date'], result['max_date']
+            return self.fetch_available_date_range(st.session_state.username)
         except Exception as e:
             st.error(f"Error getting date range: {str(e)}")
             return None, None
 
-    @st.cache_data(ttl=3600)
-    def get_unique_stores(_self):
+    @staticmethod
+    @cached_report
+    def fetch_available_date_range(username):
+        with get_db_cursor(statement_timeout=TILE_STATEMENT_TIMEOUT_MS) as cur:
+            cur.execute("""
+                SELECT MIN(date) as min_date, MAX(date) as max_date 
+                FROM income_data 
+                WHERE username = %s
+            """, (username,))
+            result = cur.fetchone()
+            return result['min_date'], result['max_date']
+
+    def get_unique_stores(self):
         """Get unique store account IDs"""
         try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    SELECT DISTINCT store_account_id 
-                    FROM income_data 
-                    WHERE username = %s
-                    ORDER BY store_account_id
-                """, (st.session_state.username,))
-                return [row['store_account_id'] for row in cur.fetchall()]
+            return self.fetch_unique_stores(st.session_state.username)
         except Exception as e:
             st.error(f"Error getting stores: {str(e)}")
             return []
 
+    @staticmethod
+    @cached_report
+    def fetch_unique_stores(username):
+        with get_db_cursor(statement_timeout=TILE_STATEMENT_TIMEOUT_MS) as cur:
+            cur.execute("""
+                SELECT DISTINCT store_account_id 
+                FROM income_data 
+                WHERE username = %s
+                ORDER BY store_account_id
+            """, (username,))
+            return [row['store_account_id'] for row in cur.fetchall()]
+
     def render_reports_page(self):
         """Main render method with performance optimization"""
         # Initialize session state if needed
@@ -123,8 +153,10 @@ class ReportGenerator:
             placeholder="Choose Store Account(s)"
         )
 
+        overview = self.get_overview_data(start_date, end_date, selected_stores)
+
         # Total income chart
-        total_income_df = self.get_total_income_data(start_date, end_date)
+        total_income_df = overview['total_income']
         if not total_income_df.empty:
             fig1 = px.line(total_income_df, 
                           x='date', 
@@ -137,7 +169,7 @@ class ReportGenerator:
             st.plotly_chart(fig1, use_container_width=True)
 
         # Store income comparison chart
-        store_income_df = self.get_store_income_data(start_date, end_date, selected_stores)
+        store_income_df = overview['store_income']
         if not store_income_df.empty:
             fig2 = px.line(store_income_df, 
                           x='date', 
@@ -152,7 +184,7 @@ class ReportGenerator:
 
         # New admin input charts
         # Visitors chart
-        visitors_df = self.get_admin_data_by_type("Pengunjung", start_date, end_date, selected_stores)
+        visitors_df = overview['Pengunjung']
         if not visitors_df.empty:
             fig3 = px.line(visitors_df,
                           x='date',
@@ -166,7 +198,7 @@ class ReportGenerator:
             st.plotly_chart(fig3, use_container_width=True)
 
         # Sales chart
-        sales_df = self.get_admin_data_by_type("Penjualan", start_date, end_date, selected_stores)
+        sales_df = overview['Penjualan']
         if not sales_df.empty:
             fig4 = px.line(sales_df,
                           x='date',
@@ -180,7 +212,7 @@ class ReportGenerator:
             st.plotly_chart(fig4, use_container_width=True)
 
         # Orders chart
-        orders_df = self.get_admin_data_by_type("Pesanan", start_date, end_date, selected_stores)
+        orders_df = overview['Pesanan']
         if not orders_df.empty:
             fig5 = px.line(orders_df,
                           x='date',
@@ -192,165 +224,81 @@ class ReportGenerator:
                 xaxis_title="Date"
             )
             st.plotly_chart(fig5, use_container_width=True)
-    
-    
 
-    def get_total_income_data(self, start_date, end_date):
+    def get_overview_data(self, start_date, end_date, selected_stores=None):
+        """
+        Fetch the five overview chart datasets in one cached batch, one round
+        trip on one connection.
+        """
+        username = st.session_state.username
+        period = Period.custom(start_date, end_date)
+        queries = [
+            ('total_income', *total_income_query(username, period)),
+            ('store_income', *store_income_query(username, period, selected_stores)),
+        ] + [
+            (data_type, *admin_data_query(username, data_type, period, selected_stores))
+            for data_type in ADMIN_TYPES
+        ]
+
+        try:
+            # A cached batch skips the database entirely
+            return report_cache.get_or_compute(
+                username, "overview", queries, lambda: run_query_batch(queries)
+            )
+        except Exception as e:
+            st.error(f"Error getting overview data: {str(e)}")
+            return {name: pd.DataFrame() for name, _, _ in queries}
+
+    def get_total_income_data(self, start_date, end_date, statement_timeout=None):
         """Get total income data across all stores"""
+        period = Period.custom(start_date, end_date)
         try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    SELECT 
-                        date,
-                        SUM(net_income) as net_income
-                    FROM income_data
-                    WHERE username = %s
-                    AND date BETWEEN %s AND %s
-                    GROUP BY date
-                    ORDER BY date
-                """, (st.session_state.username, start_date, end_date))
+            with get_db_cursor(statement_timeout=statement_timeout) as cur:
+                cur.execute(*total_income_query(st.session_state.username, period))
                 return pd.DataFrame(cur.fetchall())
         except Exception as e:
             st.error(f"Error getting total income: {str(e)}")
             return pd.DataFrame()
 
-    def get_store_income_data(self, start_date, end_date, selected_store_ids=None):
+    def get_store_income_data(self, start_date, end_date, selected_store_ids=None,
+                              statement_timeout=None):
         """Get income data by store account ID"""
+        period = Period.custom(start_date, end_date)
         try:
-            with get_db_cursor() as cur:
-                if selected_store_ids:
-                    cur.execute("""
-                        SELECT 
-                            date,
-                            store_account_id,
-                            SUM(net_income) as net_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND date BETWEEN %s AND %s
-                        AND store_account_id = ANY(%s)
-                        GROUP BY date, store_account_id
-                        ORDER BY date, store_account_id
-                    """, (st.session_state.username, start_date, end_date, selected_store_ids))
-                else:
-                    cur.execute("""
-                        SELECT 
-                            date,
-                            store_account_id,
-                            SUM(net_income) as net_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND date BETWEEN %s AND %s
-                        GROUP BY date, store_account_id
-                        ORDER BY date, store_account_id
-                    """, (st.session_state.username, start_date, end_date))
+            with get_db_cursor(statement_timeout=statement_timeout) as cur:
+                cur.execute(*store_income_query(
+                    st.session_state.username, period, selected_store_ids
+                ))
                 return pd.DataFrame(cur.fetchall())
         except Exception as e:
             st.error(f"Error getting store income: {str(e)}")
             return pd.DataFrame()
-    
+
     def get_admin_monthly_comparison_data(self, data_type, main_month, comp_month):
         """Get monthly comparison data for admin input"""
+        current, previous = month_comparison(main_month, comp_month, self.today())
         try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH main_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(value) as current_mo
-                        FROM imp_gs_admininput
-                        WHERE username = %s
-                        AND type = %s
-                        AND date >= DATE_TRUNC('month', CURRENT_DATE)
-                        AND date <= CURRENT_DATE
-                        GROUP BY store_account_id
-                    ),
-                    comp_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(value) as previous_mo
-                        FROM imp_gs_admininput
-                        WHERE username = %s
-                        AND type = %s
-                        AND date >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')
-                        AND date <= (CURRENT_DATE - INTERVAL '1 month')
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(m.store_account_id, c.store_account_id) as "Accounts",
-                        COALESCE(m.current_mo, 0) as current_mo,
-                        COALESCE(c.previous_mo, 0) as previous_mo
-                    FROM main_month_data m
-                    FULL OUTER JOIN comp_month_data c 
-                        ON m.store_account_id = c.store_account_id
-                    WHERE COALESCE(m.current_mo, 0) != 0 
-                       OR COALESCE(c.previous_mo, 0) != 0
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, data_type, st.session_state.username, data_type))
-                
-                result = cur.fetchall()
-                if not result:
-                    return pd.DataFrame()
-                    
-                df = pd.DataFrame(result)
-                
-                # Calculate differences
-                df['Diff_num'] = df['current_mo'] - df['previous_mo']
-                
-                # Calculate percentage difference
-                df['Difference %'] = df.apply(
-                    lambda row: 0 if row['previous_mo'] == 0 
-                    else ((row['current_mo'] - row['previous_mo']) / row['previous_mo'] * 100), 
-                    axis=1
-                )
-                
-                # Format number columns if not sales
-                if data_type != 'Penjualan':
-                    for col in ['current_mo', 'previous_mo', 'Diff_num']:
-                        df[col] = df[col].apply(lambda x: f"{int(x):,}")
-                else:
-                    # Format currency for sales
-                    for col in ['current_mo', 'previous_mo', 'Diff_num']:
-                        df[col] = df[col].apply(lambda x: f"Rp{int(x):,}")
-                
-                df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:.2f}%")
-                
-                return df
-                
+            return compare_periods(
+                st.session_state.username, data_type, current, previous,
+                'current_mo', 'previous_mo', drop_zero=True, difference='Diff_num'
+            )
         except Exception as e:
             st.error(f"Error in {data_type} monthly comparison: {str(e)}")
-            return pd.DataFrame()
-        
+            return ReportFrame.empty_frame()
+
+    def build_admin_monthly_table(self, df, data_type):
+        """Add differences to Accounts/current_mo/previous_mo admin rows"""
+        return compare_columns(df, 'current_mo', 'previous_mo', metric_kind(data_type),
+                               difference='Diff_num')
+
     def get_admin_data_by_type(self, data_type, start_date, end_date, selected_stores=None):
         """Get admin input data filtered by type and date range"""
+        period = Period.custom(start_date, end_date)
         try:
             with get_db_cursor() as cur:
-                if selected_stores:
-                    cur.execute("""
-                        SELECT 
-                            date,
-                            store_account_id,
-                            value
-                        FROM imp_gs_admininput
-                        WHERE username = %s
-                        AND type = %s
-                        AND date BETWEEN %s AND %s
-                        AND store_account_id = ANY(%s)
-                        GROUP BY date, store_account_id, value
-                        ORDER BY date, store_account_id
-                    """, (st.session_state.username, data_type, start_date, end_date, selected_stores))
-                else:
-                    cur.execute("""
-                        SELECT 
-                            date,
-                            store_account_id,
-                            value
-                        FROM imp_gs_admininput
-                        WHERE username = %s
-                        AND type = %s
-                        AND date BETWEEN %s AND %s
-                        GROUP BY date, store_account_id, value
-                        ORDER BY date, store_account_id
-                    """, (st.session_state.username, data_type, start_date, end_date))
+                cur.execute(*admin_data_query(
+                    st.session_state.username, data_type, period, selected_stores
+                ))
                 return pd.DataFrame(cur.fetchall())
         except Exception as e:
             st.error(f"Error getting {data_type} data: {str(e)}")
@@ -358,385 +306,85 @@ class ReportGenerator:
 
     def get_total_admin_data_by_type(self, data_type, start_date, end_date):
         """Get total admin input data for a specific type"""
+        period = Period.custom(start_date, end_date)
         try:
             with get_db_cursor() as cur:
-                cur.execute("""
+                cur.execute(f"""
                     SELECT 
                         date,
                         SUM(value) as total_value
                     FROM imp_gs_admininput
                     WHERE username = %s
                     AND type = %s
-                    AND date BETWEEN %s AND %s
+                    AND {period_predicate()}
                     GROUP BY date
                     ORDER BY date
-                """, (st.session_state.username, data_type, start_date, end_date))
+                """, (st.session_state.username, data_type, *period.params()))
                 return pd.DataFrame(cur.fetchall())
         except Exception as e:
             st.error(f"Error getting total {data_type} data: {str(e)}")
             return pd.DataFrame()
 
-    def render_as_per_today_tab(self):
-        """Render As Per Today tab content"""
-        try:
-            # Month selection
-            col1, col2 = st.columns(2)
-            with col1:
-                main_month = st.date_input(
-                    "Choose main month", 
-                    value=datetime.now().date().replace(day=1),
-                    key="main_month"
-                )
-            with col2:
-                comp_month = st.date_input(
-                    "Choose comparison month",
-                    value=(datetime.now().date() - timedelta(days=30)).replace(day=1),
-                    key="comp_month"
-                )
-
-            # Get comparison data
-            comparison_data = self.get_monthly_comparison_data(main_month, comp_month)
-            
-            if comparison_data.empty:
-                st.info("No data for current month")
-                return
-                
-            st.subheader("Monthly Comparison")
-            st.dataframe(comparison_data, hide_index=True, use_container_width=True)
-            
-        except Exception as e:
-            st.info("No data for current month")
-
     def get_monthly_comparison_data(self, main_month, comp_month):
         """Get monthly comparison data"""
+        current, previous = month_comparison(main_month, comp_month, self.today())
         try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH main_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as current_mo
-                        FROM income_data
-                        WHERE username = %s
-                        AND date >= DATE_TRUNC('month', CURRENT_DATE)
-                        AND date <= CURRENT_DATE
-                        GROUP BY store_account_id
-                    ),
-                    comp_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as previous_mo
-                        FROM income_data
-                        WHERE username = %s
-                        AND date >= DATE_TRUNC('month', CURRENT_DATE - INTERVAL '1 month')
-                        AND date <= (CURRENT_DATE - INTERVAL '1 month')
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(m.store_account_id, c.store_account_id) as "Accounts",
-                        COALESCE(m.current_mo, 0) as current_mo,
-                        COALESCE(c.previous_mo, 0) as previous_mo
-                    FROM main_month_data m
-                    FULL OUTER JOIN comp_month_data c 
-                        ON m.store_account_id = c.store_account_id
-                    WHERE COALESCE(m.current_mo, 0) != 0 
-                       OR COALESCE(c.previous_mo, 0) != 0
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, st.session_state.username))
-                
-                result = cur.fetchall()
-                if not result:
-                    return pd.DataFrame()
-                    
-                df = pd.DataFrame(result)
-                
-                # Calculate differences
-                df['Difference Rp'] = df['current_mo'] - df['previous_mo']
-                df['Difference %'] = df.apply(lambda row: 
-                    0 if row['previous_mo'] == 0
-                    else (row['Difference Rp'] / row['previous_mo'] * 100)
-                    if row['previous_mo'] != 0 else 0, axis=1)
-                
-                # Format currency columns
-                currency_cols = ['current_mo', 'previous_mo', 'Difference Rp']
-                for col in currency_cols:
-                    df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-                
-                return df
-                
+            return compare_periods(
+                st.session_state.username, INCOME_METRIC, current, previous,
+                'current_mo', 'previous_mo', drop_zero=True, difference='Difference Rp'
+            )
         except Exception as e:
             st.error(f"Error in monthly comparison: {str(e)}")
-            return pd.DataFrame()
-        
-    def get_daily_comparison_data(self):
-        """Get today vs yesterday comparison data"""
-        try:
-            today = datetime.now().date()
-            yesterday = today - timedelta(days=1)
+            return ReportFrame.empty_frame()
 
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH today_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as today_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND date = %s
-                        GROUP BY store_account_id
-                    ),
-                    yesterday_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as yesterday_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND date = %s
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(t.store_account_id, y.store_account_id) as "Accounts",
-                        COALESCE(t.today_income, 0) as today_income,
-                        COALESCE(y.yesterday_income, 0) as yesterday_income
-                    FROM today_data t
-                    FULL OUTER JOIN yesterday_data y ON t.store_account_id = y.store_account_id
-                    WHERE COALESCE(t.today_income, 0) != 0 
-                       OR COALESCE(y.yesterday_income, 0) != 0
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, today, 
-                     st.session_state.username, yesterday))
-                
-                result = cur.fetchall()
-                if not result:
-                    return pd.DataFrame()
-                    
-                df = pd.DataFrame(result)
-                
-                # Calculate differences
-                df['Difference Rp'] = df['today_income'] - df['yesterday_income']
-                df['Difference %'] = df.apply(lambda row: 
-                    0 if row['yesterday_income'] == 0
-                    else (row['Difference Rp'] / row['yesterday_income'] * 100)
-                    if row['yesterday_income'] != 0 else 0, axis=1)
-                
-                # Format currency columns
-                for col in ['today_income', 'yesterday_income', 'Difference Rp']:
-                    df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-                
-                return df
-                
-        except Exception as e:
-            st.error(f"Error getting daily comparison: {str(e)}")
-            return pd.DataFrame()
-        
-    def get_daily_admin_comparison_data(self, data_type):
-        """Get today vs yesterday comparison data for admin input"""
+    def get_period_comparisons(self, metric, pairs, drop_zero=True, difference='Difference Rp'):
+        """Compare metric over several period pairs in one query, one frame per pair"""
         try:
-            today = datetime.now().date()
-            yesterday = today - timedelta(days=1)
-
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH today_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(value) as today
-                        FROM imp_gs_admininput
-                        WHERE username = %s
-                        AND type = %s
-                        AND date = %s
-                        GROUP BY store_account_id
-                    ),
-                    yesterday_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(value) as yesterday
-                        FROM imp_gs_admininput
-                        WHERE username = %s
-                        AND type = %s
-                        AND date = %s
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(t.store_account_id, y.store_account_id) as "Accounts",
-                        COALESCE(t.today, 0) as today,
-                        COALESCE(y.yesterday, 0) as yesterday
-                    FROM today_data t
-                    FULL OUTER JOIN yesterday_data y ON t.store_account_id = y.store_account_id
-                    WHERE COALESCE(t.today, 0) != 0 
-                       OR COALESCE(y.yesterday, 0) != 0
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, data_type, today, 
-                     st.session_state.username, data_type, yesterday))
-                
-                result = cur.fetchall()
-                if not result:
-                    return pd.DataFrame()
-                    
-                df = pd.DataFrame(result)
-                
-                # Calculate differences
-                df['Diff_num'] = df['today'] - df['yesterday']
-                
-                # Calculate percentage difference
-                df['Diff_%'] = df.apply(
-                    lambda row: 0 if row['yesterday'] == 0 
-                    else ((row['today'] - row['yesterday']) / row['yesterday'] * 100), 
-                    axis=1
-                )
-                
-                # Format columns based on type
-                if data_type != 'Penjualan':
-                    for col in ['today', 'yesterday', 'Diff_num']:
-                        df[col] = df[col].apply(lambda x: f"{int(x):,}")
-                else:
-                    # Format currency for sales
-                    for col in ['today', 'yesterday', 'Diff_num']:
-                        df[col] = df[col].apply(lambda x: f"Rp{int(x):,}")
-                
-                df['Diff_%'] = df['Diff_%'].apply(lambda x: f"{x:.2f}%")
-                
-                return df
-                
+            return compare_period_pairs(
+                st.session_state.username, metric, pairs,
+                drop_zero=drop_zero, difference=difference
+            )
         except Exception as e:
-            st.error(f"Error in {data_type} daily comparison: {str(e)}")
-            return pd.DataFrame()
+            st.error(f"Error comparing periods: {str(e)}")
+            return [ReportFrame.empty_frame() for _ in pairs]
 
-    def render_todays_income_tab(self):
-        """Render Today's Income tab content"""
-        st.subheader("Today's Income")
-        
-        today_data = self.get_today_income_data()
-        if not today_data.empty:
-            st.dataframe(
-                today_data,
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("No data available for today")
+    def build_monthly_income_table(self, df):
+        """Add differences to Accounts/current_mo/previous_mo income rows"""
+        return compare_columns(df, 'current_mo', 'previous_mo', CURRENCY, difference='Difference Rp')
+
+    def build_daily_admin_table(self, df, data_type):
+        """Add differences to Accounts/today/yesterday admin rows"""
+        return compare_columns(df, 'today', 'yesterday', metric_kind(data_type),
+                               difference='Diff_num', percent='Diff_%')
 
     def get_today_income_data(self):
-        """Get today's income comparison data"""
+        """Get today's income against the same day 30 days earlier"""
         try:
-            today = datetime.now().date()
-            last_month = today - timedelta(days=30)
+            today = Period.day(self.today())
+            last_month = Period.day(self.today() - timedelta(days=30))
             
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH today_data AS (
-                        SELECT 
-                            store_account_id,
-                            store_name,
-                            account_name,
-                            SUM(net_income) as today_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND date = %s
-                        GROUP BY store_account_id, store_name, account_name
-                    ),
-                    last_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            store_name,
-                            account_name,
-                            SUM(net_income) as last_month_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND date = %s
-                        GROUP BY store_account_id, store_name, account_name
-                    )
-                    SELECT 
-                        COALESCE(t.store_account_id, l.store_account_id) as "Store ID",
-                        COALESCE(t.store_name, l.store_name) as "Store",
-                        COALESCE(t.account_name, l.account_name) as "Account",
-                        COALESCE(t.today_income, 0) as today_income,
-                        COALESCE(l.last_month_income, 0) as last_month_income,
-                        COALESCE(t.today_income, 0) - COALESCE(l.last_month_income, 0) as "Diff_IDR",
-                        CASE 
-                            WHEN COALESCE(l.last_month_income, 0) = 0 THEN 0
-                            ELSE ROUND(((COALESCE(t.today_income, 0) - COALESCE(l.last_month_income, 0)) * 100.0 / 
-                                  NULLIF(COALESCE(l.last_month_income, 0), 0))::numeric, 2)
-                        END as "Diff_%"
-                    FROM today_data t
-                    FULL OUTER JOIN last_month_data l 
-                        ON t.store_account_id = l.store_account_id
-                    ORDER BY "Store", "Account"
-                """, (st.session_state.username, today, st.session_state.username, last_month))
+            with get_db_cursor(statement_timeout=TILE_STATEMENT_TIMEOUT_MS) as cur:
+                cur.execute(*today_income_query(st.session_state.username, today, last_month))
                 
                 result = cur.fetchall()
                 if result:
-                    df = pd.DataFrame(result)
-                    # Format currency columns
-                    currency_cols = ['today_income', 'last_month_income', 'Diff_IDR']
-                    for col in currency_cols:
-                        df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                    df['Diff_%'] = df['Diff_%'].apply(lambda x: f"{x:,.2f}%")
-                    return df
-                return pd.DataFrame()
+                    return ReportFrame(
+                        pd.DataFrame(result),
+                        {'today_income': CURRENCY, 'last_month_income': CURRENCY,
+                         'Diff_IDR': CURRENCY, 'Diff_%': PERCENT},
+                        {'Diff_%': ('today_income', 'last_month_income')},
+                        label_column='Store ID'
+                    )
+                return ReportFrame.empty_frame()
         except Exception as e:
             st.error(f"Error in today's income: {str(e)}")
-            return pd.DataFrame()
+            return ReportFrame.empty_frame()
     
-    def get_income_today_comparison(self):
-        try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    SELECT EXISTS (
-                        SELECT 1 FROM income_data 
-                        WHERE username = %s 
-                        AND date = CURRENT_DATE
-                    )
-                """, (st.session_state.username,))
-                
-                has_data = cur.fetchone()['exists']
-                
-                if not has_data:
-                    return None
-                    
-                cur.execute("""
-                    WITH today_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as current_mo
-                        FROM income_data
-                        WHERE username = %s
-                        AND date = CURRENT_DATE
-                        GROUP BY store_account_id
-                    ),
-                    lastmonth_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as previous_mo
-                        FROM income_data
-                        WHERE username = %s
-                        AND date = (CURRENT_DATE - INTERVAL '1 month')
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        t.store_account_id as "Accounts",
-                        t.current_mo,
-                        COALESCE(l.previous_mo, 0) as previous_mo
-                    FROM today_data t
-                    LEFT JOIN lastmonth_data l USING (store_account_id)
-                """, (st.session_state.username, st.session_state.username))
-                
-                df = pd.DataFrame(cur.fetchall())
-                df['Diff_num'] = df['current_mo'] - df['previous_mo'] 
-                df['Difference_%'] = (df['Diff_num'] / df['previous_mo'] * 100).fillna(0)
-                
-                for col in ['current_mo', 'previous_mo', 'Diff_num']:
-                    df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                df['Difference_%'] = df['Difference_%'].apply(lambda x: f"{x:.2f}%")
-                
-                return df
-                    
-        except Exception as e:
-            st.error(f"Error getting income today comparison: {str(e)}")
-            return None
-        
+    def build_income_today_table(self, df):
+        """Add differences to Accounts/current_mo/previous_mo rows of today's income"""
+        return compare_columns(df, 'current_mo', 'previous_mo', CURRENCY,
+                               difference='Diff_num', percent='Difference_%')
+
     def render_admin_input_section(self):
         """Render Admin Input Data tab content"""
         st.header("Admin Input Data")
@@ -772,22 +420,16 @@ class ReportGenerator:
             key="admin_type_filter"
         )
         
-        # Get and display filtered data
-        filtered_data = self.get_filtered_admin_data(
-            selected_store,
-            selected_type,
-            start_date,
-            end_date
+        # Get and display one page of filtered data
+        self.render_paged_table(
+            'admin_page',
+            (selected_store, selected_type, start_date, end_date),
+            lambda after, page_size: self.get_filtered_admin_data(
+                selected_store, selected_type, start_date, end_date, after, page_size
+            ),
+            self.format_admin_page,
+            ["Date", "Store Account ID", "Type", "UniqueID"]
         )
-        
-        if not filtered_data.empty:
-            st.dataframe(
-                filtered_data,
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("No data available")
 
     def get_unique_types(self):
         """Get unique types from admin input data"""
@@ -804,54 +446,43 @@ class ReportGenerator:
             st.error(f"Error getting types: {str(e)}")
             return []
 
-    def get_filtered_admin_data(self, store_account_id_filter, type_filter, start_date, end_date):
-        """Get filtered admin input data"""
-        try:
-            with get_db_cursor() as cur:
-                # Build base query
-                query = """
-                    SELECT 
-                        date::date as "Date",
-                        store_account_id as "Store Account ID",
-                        type as "Type",
-                        value as "Value"
-                    FROM imp_gs_admininput
-                    WHERE username = %s
-                """
-                params = [st.session_state.username]
-                
-                # Add filters
-                if store_account_id_filter != "All":
-                    query += " AND store_account_id = %s"
-                    params.append(store_account_id_filter)
-                
-                if type_filter != "All":
-                    query += " AND type = %s"
-                    params.append(type_filter)
-                
-                if start_date and end_date:
-                    query += " AND date BETWEEN %s AND %s"
-                    params.extend([start_date, end_date])
-                
-                query += " ORDER BY date DESC"
+    def get_filtered_admin_data(self, store_account_id_filter, type_filter, start_date, end_date,
+                                after=None, page_size=PAGE_SIZES[0]):
+        """
+        Get one newest-first page of filtered admin input data, continuing
+        after the (date, store, type, UniqueID) key of the previous page's
+        last row. Returns the page, whether more rows follow and the
+        estimated total.
+        """
+        conditions, params = admin_page_filters(
+            st.session_state.username,
+            store_account_id_filter if store_account_id_filter != "All" else None,
+            type_filter if type_filter != "All" else None,
+            Period.custom(start_date, end_date) if start_date and end_date else None
+        )
+        query, page_params = admin_page_query(conditions, params, after, page_size)
 
-                cur.execute(query, tuple(params))
-                result = cur.fetchall()
-                
-                if result:
-                    df = pd.DataFrame(result)
-                    # Format value based on type
-                    df["Value"] = df.apply(
-                        lambda row: f"Rp{int(row['Value']):,}" if row["Type"] == "Penjualan" 
-                        else f"{int(row['Value']):,}", 
-                        axis=1
-                    )
-                    return df
-                return pd.DataFrame()
+        try:
+            with get_db_cursor(statement_timeout=TILE_STATEMENT_TIMEOUT_MS) as cur:
+                cur.execute(query, page_params)
+                df = pd.DataFrame(cur.fetchall())
+                estimate = estimate_rows(cur, 'imp_gs_admininput', conditions, params)
+            return df.head(page_size), len(df) > page_size, estimate
                 
         except Exception as e:
             st.error(f"Error in filtered data: {str(e)}")
-            return pd.DataFrame() 
+            return pd.DataFrame(), False, 0
+
+    def format_admin_page(self, df):
+        """Format the visible page of admin input rows"""
+        df = df.drop(columns=["UniqueID"])
+        df["Date"] = pd.to_datetime(df["Date"]).dt.date
+        # Sales are money, visitors and orders are counts
+        df["Value"] = [
+            format_value(float(value), metric_kind(data_type))
+            for value, data_type in zip(df["Value"], df["Type"])
+        ]
+        return df
 
     def render_income_data_section(self):
         """Render Income Data tab content"""
@@ -879,82 +510,84 @@ class ReportGenerator:
             ["All"] + stores
         )
         
-        # Get and display filtered data
-        filtered_data = self.get_filtered_income_data(
-            selected_store,
-            start_date,
-            end_date
+        # Get and display one page of filtered data
+        self.render_paged_table(
+            'income_page',
+            (selected_store, start_date, end_date),
+            lambda after, page_size: self.get_filtered_income_data(
+                selected_store, start_date, end_date, after, page_size
+            ),
+            self.format_income_page,
+            ["Date", "Store Account ID"]
         )
-        
-        if not filtered_data.empty:
-            st.dataframe(
-                filtered_data,
-                hide_index=True,
-                use_container_width=True
-            )
-        else:
-            st.info("No data available")
 
-    def get_filtered_income_data(self, store_account_id_filter, start_date, end_date):
-        """Get filtered income data"""
+    def get_filtered_income_data(self, store_account_id_filter, start_date, end_date,
+                                 after=None, page_size=PAGE_SIZES[0]):
+        """
+        Get one newest-first page of filtered income data, continuing after
+        the (date, store) key of the previous page's last row. Returns the
+        page, whether more rows follow and the estimated total.
+        """
+        conditions, params = income_page_filters(
+            st.session_state.username,
+            store_account_id_filter if store_account_id_filter != "All" else None,
+            Period.custom(start_date, end_date) if start_date and end_date else None
+        )
+        query, page_params = income_page_query(conditions, params, after, page_size)
+
         try:
-            with get_db_cursor() as cur:
-                if store_account_id_filter == "All":
-                    if start_date and end_date:
-                        cur.execute("""
-                            SELECT 
-                                date::date as "Date",
-                                store_account_id as "Store Account ID",
-                                net_income as "Net Income"
-                            FROM income_data
-                            WHERE username = %s
-                            AND date BETWEEN %s AND %s
-                            ORDER BY date DESC
-                        """, (st.session_state.username, start_date, end_date))
-                    else:
-                        cur.execute("""
-                            SELECT 
-                                date::date as "Date",
-                                store_account_id as "Store Account ID",
-                                net_income as "Net Income"
-                            FROM income_data
-                            WHERE username = %s
-                            ORDER BY date DESC
-                        """, (st.session_state.username,))
-                else:
-                    if start_date and end_date:
-                        cur.execute("""
-                            SELECT 
-                                date::date as "Date",
-                                store_account_id as "Store Account ID",
-                                net_income as "Net Income"
-                            FROM income_data
-                            WHERE username = %s
-                            AND store_account_id = %s
-                            AND date BETWEEN %s AND %s
-                            ORDER BY date DESC
-                        """, (st.session_state.username, store_account_id_filter, start_date, end_date))
-                    else:
-                        cur.execute("""
-                            SELECT 
-                                date::date as "Date",
-                                store_account_id as "Store Account ID",
-                                net_income as "Net Income"
-                            FROM income_data
-                            WHERE username = %s
-                            AND store_account_id = %s
-                            ORDER BY date DESC
-                        """, (st.session_state.username, store_account_id_filter))
-                
-                result = cur.fetchall()
-                if result:
-                    df = pd.DataFrame(result)
-                    df["Net Income"] = df["Net Income"].apply(lambda x: f"Rp{x:,.0f}")
-                    return df
-                return pd.DataFrame()
+            with get_db_cursor(statement_timeout=TILE_STATEMENT_TIMEOUT_MS) as cur:
+                cur.execute(query, page_params)
+                df = pd.DataFrame(cur.fetchall())
+                estimate = estimate_rows(cur, 'income_data', conditions, params)
+            return df.head(page_size), len(df) > page_size, estimate
         except Exception as e:
             st.error(f"Error in filtered data: {str(e)}")
-            return pd.DataFrame()
+            return pd.DataFrame(), False, 0
+
+    def format_income_page(self, df):
+        """Format the visible page of income rows"""
+        df["Date"] = pd.to_datetime(df["Date"]).dt.date
+        df["Net Income"] = [format_value(float(value), CURRENCY) for value in df["Net Income"]]
+        return df
+
+    def render_paged_table(self, key, filters, fetch_page, format_page, key_columns):
+        """
+        Show one page of a keyset-paginated table with page size and
+        previous/next controls. The session keeps the key of the last row of
+        every page visited, so Previous steps back without an OFFSET.
+        """
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+
+        state = st.session_state.get(key)
+        if state is None or state['filters'] != (filters, page_size):
+            # New filters start again from the newest rows
+            state = {'filters': (filters, page_size), 'cursors': [None]}
+            st.session_state[key] = state
+
+        df, has_next, estimate = fetch_page(state['cursors'][-1], page_size)
+        if df.empty:
+            st.info("No data available")
+            return
+
+        page = len(state['cursors'])
+        first_row = (page - 1) * page_size + 1
+        st.dataframe(format_page(df.copy()), hide_index=True, use_container_width=True)
+
+        col1, col2, col3 = st.columns([1, 3, 1])
+        with col1:
+            if st.button("Previous", key=f"{key}_previous", disabled=page == 1):
+                state['cursors'].pop()
+                st.rerun()
+        with col2:
+            st.caption(
+                f"Page {page}, rows {first_row:,}-{first_row + len(df) - 1:,} "
+                f"of about {max(estimate, first_row + len(df) - 1):,}"
+            )
+        with col3:
+            if st.button("Next", key=f"{key}_next", disabled=not has_next):
+                state['cursors'].append(tuple(df[key_columns].iloc[-1].tolist()))
+                st.rerun()
 
     def generate_excel_report(self, total_income_df, store_income_df, start_date, end_date):
         """Generate Excel report with multiple sheets"""
@@ -979,32 +612,26 @@ class ReportGenerator:
             
             # Write monthly comparison
             monthly_data = self.get_monthly_comparison_data(
-                datetime.now().date().replace(day=1),
-                (datetime.now().date() - timedelta(days=30)).replace(day=1)
+                self.today().replace(day=1),
+                (self.today() - timedelta(days=30)).replace(day=1)
             )
             if not monthly_data.empty:
-                monthly_data.to_excel(
-                    writer,
-                    sheet_name='Monthly Comparison',
-                    index=False
-                )
+                monthly_data.with_total().to_excel(writer, 'Monthly Comparison')
             
             # Write today's income
             today_data = self.get_today_income_data()
             if not today_data.empty:
-                today_data.to_excel(
-                    writer,
-                    sheet_name="Today's Income",
-                    index=False
-                )
+                today_data.to_excel(writer, "Today's Income")
             
             # Get workbook and add formats
             workbook = writer.book
             currency_format = workbook.add_format({'num_format': 'Rp#,##0'})
             date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
             
-            # Apply formats to each sheet
-            for sheet_name in writer.sheets:
+            # Apply formats to the raw data sheets; report frames format their own columns
+            for sheet_name in ['Total Income', 'Store Income']:
+                if sheet_name not in writer.sheets:
+                    continue
                 worksheet = writer.sheets[sheet_name]
                 worksheet.set_column('A:A', 15, date_format)  # Date columns
                 worksheet.set_column('B:D', 20)  # ID and name columns
@@ -1015,8 +642,12 @@ class ReportGenerator:
 
     def export_report(self, start_date, end_date, selected_stores=None):
         """Export reports to Excel"""
-        total_income_df = self.get_total_income_data(start_date, end_date)
-        store_income_df = self.get_store_income_data(start_date, end_date, selected_stores)
+        total_income_df = self.get_total_income_data(
+            start_date, end_date, statement_timeout=LONG_STATEMENT_TIMEOUT_MS
+        )
+        store_income_df = self.get_store_income_data(
+            start_date, end_date, selected_stores, statement_timeout=LONG_STATEMENT_TIMEOUT_MS
+        )
         
         excel_binary = self.generate_excel_report(
             total_income_df,
@@ -1044,7 +675,7 @@ class ReportGenerator:
             return
 
         # Year selection
-        current_year = datetime.now().year
+        current_year = self.today().year
         year = st.selectbox(
             "Year",
             options=available_years,
@@ -1090,12 +721,30 @@ class ReportGenerator:
         """Get list of years available in data"""
         try:
             with get_db_cursor() as cur:
+                # MIN/MAX come off the (username, date) index, and each
+                # candidate year is probed with a range EXISTS
                 cur.execute("""
-                    SELECT DISTINCT EXTRACT(YEAR FROM date) as year
-                    FROM income_data
-                    WHERE username = %s
+                    WITH bounds AS (
+                        SELECT MIN(date) as first_date, MAX(date) as last_date
+                        FROM income_data
+                        WHERE username = %s
+                    )
+                    SELECT EXTRACT(YEAR FROM y.year_start) as year
+                    FROM bounds,
+                         generate_series(
+                             DATE_TRUNC('year', bounds.first_date),
+                             bounds.last_date,
+                             INTERVAL '1 year'
+                         ) AS y(year_start)
+                    WHERE EXISTS (
+                        SELECT 1
+                        FROM income_data
+                        WHERE username = %s
+                        AND date >= y.year_start
+                        AND date < y.year_start + INTERVAL '1 year'
+                    )
                     ORDER BY year DESC
-                """, (st.session_state.username,))
+                """, (st.session_state.username, st.session_state.username))
                 return [int(row['year']) for row in cur.fetchall()]
         except Exception as e:
             st.error(f"Error fetching available years: {str(e)}")
@@ -1103,7 +752,7 @@ class ReportGenerator:
 
     def get_available_quarters(self, year):
         """Get list of completed quarters for given year"""
-        current_date = datetime.now()
+        current_date = self.today()
         current_year = current_date.year
         current_quarter = (current_date.month - 1) // 3 + 1
         
@@ -1115,470 +764,142 @@ class ReportGenerator:
 
     def is_year_complete(self, year):
         """Check if year is complete"""
-        current_date = datetime.now()
+        current_date = self.today()
         return year < current_date.year
     
-    def add_total_row(df):
-        """Add total row to any dataframe with proper formatting"""
-        if df is None or df.empty:
-            return df
-       
-        try:
-        #  Create total row
-            total = pd.DataFrame([{
-            'Accounts': 'Total',
-            'current_mo': df['current_mo'].str.replace('Rp', '').str.replace(',', '').astype(float).sum(),
-            'previous_mo': df['previous_mo'].str.replace('Rp', '').str.replace(',', '').astype(float).sum()
-            }])
-        
-        # Calculate differences for total row
-            total['Diff_num'] = total['current_mo'] - total['previous_mo']
-            total['Difference %'] = (total['Diff_num'] / total['previous_mo'] * 100).fillna(0)
-        
-        # Format total row same as other rows
-            for col in ['current_mo', 'previous_mo', 'Diff_num']:
-                total[col] = total[col].apply(lambda x: f"Rp{x:,.0f}")
-            total['Difference %'] = total['Difference_%'].apply(lambda x: f"{x:.2f}%")
-        
-        # Combine with original dataframe
-            return pd.concat([df, total], ignore_index=True)
-        
-        except Exception as e:
-            st.error(f"Error adding total row: {str(e)}")
-            return df
-        
-    def format_with_total(self, df, from_func_name):
+    def add_total_row(self, frame):
+        """Add total row to a report frame"""
+        if frame is None or frame.empty:
+            return frame
+        return frame.with_total()
+        
+    def format_with_total(self, frame):
+        """Add total row to a comparison frame and format it for display"""
+        if frame is None:
+            return pd.DataFrame()
+        return frame.with_total().formatted()
+    
+    def get_current_month_bundle(self):
         """
-        Add total row to dataframes from any get_X_comparison function
-        from_func_name: monthly, income_today, admin_monthly, daily_admin
+        Fetch every figure of the current month report.
+
+        One scan per table over the span of all compared periods, with a
+        SUM() FILTER column per period, returns a row per store and metric.
+        The income and admin input scans run concurrently on their own
+        connections. Figures are NULL where the store has no rows in that period.
         """
-        if df is None or df.empty:
-            return df
-       
+        queries = current_month_queries(st.session_state.username, self.today())
+        loader = ConcurrentLoader()
+        for name, (query, params) in queries.items():
+            loader.add(name, fetch_dataframe, query, params)
         try:
-            # Set columns based on function source
-            cols = {
-                'monthly': ['current_mo', 'previous_mo', 'Difference Rp'],
-                'income_today': ['current_mo', 'previous_mo', 'Diff_num'],
-                'admin_monthly': ['current_mo', 'previous_mo', 'Diff_num'],
-                'daily_admin': ['today', 'yesterday', 'Diff_num']
-            }
-            
-            numeric_cols = cols[from_func_name]
-            pct_col = 'Difference %' if from_func_name != 'daily_admin' else 'Diff %'
-            
-            # Create total row
-            sums = {col: df[col].str.replace('Rp', '').str.replace(',', '').astype(float).sum() 
-                    for col in numeric_cols}
-            total = pd.DataFrame([{
-                'Accounts': 'Total',
-                **sums
-            }])
-            
-            # Add percentage
-            total[pct_col] = ((total[numeric_cols[0]] - total[numeric_cols[1]]) / 
-                                total[numeric_cols[1]] * 100).fillna(0)
-            
-            # Format columns
-            for col in numeric_cols:
-                total[col] = total[col].apply(lambda x: f"Rp{x:,.0f}")
-            total[pct_col] = total[pct_col].apply(lambda x: f"{x:.2f}%")
-            
-            return pd.concat([df, total], ignore_index=True)
-            
+            frames = loader.run()
         except Exception as e:
-            st.error(f"Error adding total row: {str(e)}")
-            return df
-    
-    def generate_current_month_pdf(self, comparison_data, monthly_chart,
-                                 visitors_data, orders_data, sales_data,
-                                 daily_visitors, daily_orders, daily_sales,
-                                 month_year):
-        """Generate PDF for current month report including all data"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=20,
-            leftMargin=20,
-            topMargin=30,
-            bottomMargin=30
-        )
-        
-        # Calculate available width
-        available_width = doc.width + doc.rightMargin + doc.leftMargin
-        
-        story = []
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontName='Helvetica-Bold',
-            fontSize=16,
-            spaceAfter=30
-        )
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontName='Helvetica-Bold',
-            fontSize=14,
-            spaceAfter=20
-        )
-        
-        # Title
-        story.append(Paragraph(f"Current Month Report - {month_year}", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Income section
-        story.append(Paragraph("Monthly Income Comparison", subtitle_style))
-        if monthly_chart:
-            chart_buffer = self.save_chart_for_pdf(monthly_chart)
-            if chart_buffer:
-                story.append(Image(chart_buffer, width=available_width, height=300))
-        
-        if not comparison_data.empty:
-            story.append(Spacer(1, 20))
-            income_table = self.create_pdf_table(comparison_data)
-            story.append(income_table)
-        
-        story.append(Spacer(1, 30))
-        
-        # Income Today section
-        st.subheader("Income Today") 
-        income_today = self.get_income_today_comparison()
-        st.write("Debug - DataFrame:", income_today)
-        if not income_today.empty:
-            st.dataframe(income_today, hide_index=True, use_container_width=True)
-        else:
-            st.info("No income data for today")
-
-        # Modify the PDF section to include Income Today
-        if comparison_data.empty:
-            story.append(Spacer(1, 30))
-
-        story.append(Paragraph("Income Today", subtitle_style))
-        if not income_today.empty:
-            income_today_table = self.create_pdf_table(income_today)
-            story.append(income_today_table)
-        
-        # Visitors section
-        if not visitors_data.empty:
-            story.append(Paragraph("Monthly Visitors Comparison", subtitle_style))
-            visitors_table = self.create_pdf_table(visitors_data)
-            story.append(visitors_table)
-            story.append(Spacer(1, 20))
-            
-            if not daily_visitors.empty:
-                story.append(Paragraph("Visitors Today", subtitle_style))
-                daily_visitors_table = self.create_pdf_table(daily_visitors)
-                story.append(daily_visitors_table)
-                story.append(Spacer(1, 30))
-        
-        # Orders section
-        if not orders_data.empty:
-            story.append(Paragraph("Monthly Orders Comparison", subtitle_style))
-            orders_table = self.create_pdf_table(orders_data)
-            story.append(orders_table)
-            story.append(Spacer(1, 20))
-            
-            if not daily_orders.empty:
-                story.append(Paragraph("Orders Today", subtitle_style))
-                daily_orders_table = self.create_pdf_table(daily_orders)
-                story.append(daily_orders_table)
-                story.append(Spacer(1, 30))
-        
-        # Sales section
-        if not sales_data.empty:
-            story.append(Paragraph("Monthly Sales Comparison", subtitle_style))
-            sales_table = self.create_pdf_table(sales_data)
-            story.append(sales_table)
-            story.append(Spacer(1, 20))
-            
-            if not daily_sales.empty:
-                story.append(Paragraph("Sales Today", subtitle_style))
-                daily_sales_table = self.create_pdf_table(daily_sales)
-                story.append(daily_sales_table)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
+            st.error(f"Error loading current month figures: {str(e)}")
+            return None
+        self.show_load_timings(loader)
 
-    def create_current_month_chart(self, comparison_data):
-        """Create comparison bar chart for current month"""
-        # Extract current and previous month columns
-        current_month_col = comparison_data.columns[1]  # The current month column
-        prev_month_col = comparison_data.columns[2]     # The previous month column
-        
-        # Create figure
-        fig = go.Figure()
-        
-        # Add current month bars
-        fig.add_trace(go.Bar(
-            x=comparison_data['Accounts'],
-            y=comparison_data[current_month_col].apply(
-                lambda x: float(x.replace('Rp', '').replace(',', ''))
-            ),
-            name=current_month_col,
-            text=comparison_data[current_month_col],
-            textposition='auto',
-        ))
-        
-        # Add previous month bars
-        fig.add_trace(go.Bar(
-            x=comparison_data['Accounts'],
-            y=comparison_data[prev_month_col].apply(
-                lambda x: float(x.replace('Rp', '').replace(',', ''))
-            ),
-            name=prev_month_col,
-            text=comparison_data[prev_month_col],
-            textposition='auto',
-            opacity=0.7
-        ))
-        
-        # Update layout
-        fig.update_layout(
-            title="Current Month vs Previous Month Comparison",
-            xaxis_title="Store Accounts",
-            yaxis_title="Net Income (Rp)",
-            barmode='group',
-            height=500,
-            xaxis={'categoryorder':'total descending'}  # Order bars by total value
+        columns = ['metric', 'store_account_id'] + CURRENT_MONTH_FIGURES
+        bundle = pd.concat(
+            [frames['income'].reindex(columns=columns), frames['admin input'].reindex(columns=columns)],
+            ignore_index=True
         )
-        
-        return fig
-    
-    def create_daily_comparison_chart(self, daily_data):
-        """Create bar chart for today vs yesterday comparison"""
-        try:
-            # Convert currency strings back to numbers for plotting
-            df = daily_data.copy()
-            for col in ['today_income', 'yesterday_income']:
-                df[col] = df[col].str.replace('Rp', '').str.replace(',', '').astype(float)
-            
-            fig = go.Figure()
-            
-            # Add today's bars
-            fig.add_trace(go.Bar(
-                x=df['Accounts'],
-                y=df['today_income'],
-                name="Today",
-                text=daily_data['today_income'],
-                textposition='auto',
-            ))
-            
-            # Add yesterday's bars
-            fig.add_trace(go.Bar(
-                x=df['Accounts'],
-                y=df['yesterday_income'],
-                name="Yesterday",
-                text=daily_data['yesterday_income'],
-                textposition='auto',
-                opacity=0.7
-            ))
-            
-            # Update layout with legend at bottom
-            fig.update_layout(
-                title="Today vs Yesterday Income Comparison",
-                xaxis_title="Store Accounts",
-                yaxis_title="Net Income (Rp)",
-                barmode='group',
-                height=500,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=-0.25,
-                    xanchor="center",
-                    x=0.5
-                ),
-                margin=dict(l=50, r=50, t=70, b=100)  # Adjust margins for legend
-            )
-            
-            return fig
-            
-        except Exception as e:
-            st.error(f"Error creating daily comparison chart: {str(e)}")
-            return None
+        bundle[CURRENT_MONTH_FIGURES] = bundle[CURRENT_MONTH_FIGURES].astype(float)
+        return bundle
 
-    def create_as_per_today_table(self, current_data, prev_data):
-        """Create as per today comparison table"""
-        # Group by store_account_id
-        current_totals = current_data.groupby('store_account_id')['net_income'].sum()
-        prev_totals = prev_data.groupby('store_account_id')['net_income'].sum()
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Accounts': current_totals.index,
-            current_data['date'].dt.strftime('%B %Y').iloc[0]: current_totals.values,
-            prev_data['date'].dt.strftime('%B %Y').iloc[0]: prev_totals
-        })
-        
-        # Calculate differences
-        df['Difference Rp'] = df.iloc[:, 1] - df.iloc[:, 2]
-        df['Difference %'] = (df['Difference Rp'] / df.iloc[:, 2] * 100).round(2)
-        
-        # Add total row
-        total_row = pd.DataFrame({
-            'Accounts': ['Total'],
-            df.columns[1]: [df.iloc[:, 1].sum()],
-            df.columns[2]: [df.iloc[:, 2].sum()],
-            'Difference Rp': [df['Difference Rp'].sum()],
-            'Difference %': [(df.iloc[:, 1].sum() - df.iloc[:, 2].sum()) / df.iloc[:, 2].sum() * 100]
-        })
-        
-        df = pd.concat([df, total_row])
-        
-        # Format currency columns
-        for col in [df.columns[1], df.columns[2], 'Difference Rp']:
-            df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-        df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-        
-        return df
+    def show_load_timings(self, loader):
+        """Show concurrent load timings on the page in debug mode"""
+        if DEBUG_DIAGNOSTICS:
+            st.caption(loader.summary())
 
-    def create_todays_income_table(self, current_data, prev_data):
-        """Create today's income comparison table"""
-        # Get today's data and last month's same day
-        today = current_data['date'].max()
-        current_today = current_data[current_data['date'] == today]
-        prev_today = prev_data[prev_data['date'] == today]
-        
-        # Group by store_account_id
-        current_totals = current_today.groupby('store_account_id')['net_income'].sum()
-        prev_totals = prev_today.groupby('store_account_id')['net_income'].sum()
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Accounts': current_totals.index,
-            current_today['date'].dt.strftime('%B %Y').iloc[0]: current_totals.values,
-            prev_today['date'].dt.strftime('%B %Y').iloc[0]: prev_totals
-        })
-        
-        # Calculate differences
-        df['Difference Rp'] = df.iloc[:, 1] - df.iloc[:, 2]
-        df['Difference %'] = (df['Difference Rp'] / df.iloc[:, 2] * 100).round(2)
-        
-        # Add total row
-        total_row = pd.DataFrame({
-            'Accounts': ['Total'],
-            df.columns[1]: [df.iloc[:, 1].sum()],
-            df.columns[2]: [df.iloc[:, 2].sum()],
-            'Difference Rp': [df['Difference Rp'].sum()],
-            'Difference %': [(df.iloc[:, 1].sum() - df.iloc[:, 2].sum()) / df.iloc[:, 2].sum() * 100]
-        })
-        
-        df = pd.concat([df, total_row])
-        
-        # Format currency columns
-        for col in [df.columns[1], df.columns[2], 'Difference Rp']:
-            df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-        df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-        
-        return df
+    def slice_current_month_bundle(self, bundle, metric, current, previous,
+                                   current_name, previous_name, require_current=False):
+        """
+        Cut one comparison out of the bundle as Accounts/current/previous rows.
+
+        Stores with neither figure set are dropped, like the FULL OUTER JOIN
+        the standalone queries use; require_current keeps only stores with
+        rows in the current period, like their LEFT JOIN.
+        """
+        rows = bundle[bundle['metric'] == metric]
+        if require_current:
+            rows = rows[rows[current].notna()]
+        rows = rows[['store_account_id', current, previous]].fillna(0)
+        if not require_current:
+            rows = rows[(rows[current] != 0) | (rows[previous] != 0)]
+        return rows.rename(columns={
+            'store_account_id': 'Accounts', current: current_name, previous: previous_name
+        }).sort_values('Accounts').reset_index(drop=True)
 
     def generate_current_month_report(self, year):
         """Generate current month report"""
         try:
-            current_date = datetime.now()
-       
-            def display_comparison_table(df, from_func_name, info_message="No data available"):
-                if df is not None and not df.empty:
-                    df = self.format_with_total(df, from_func_name)
-                    st.dataframe(df, hide_index=True, use_container_width=True)
+            def display_comparison_table(frame, info_message="No data available"):
+                if frame is not None and not frame.empty:
+                    st.dataframe(self.format_with_total(frame), hide_index=True, use_container_width=True)
                 else:
                     st.info(info_message)
 
+            bundle = self.get_current_month_bundle()
+            if bundle is None:
+                return
+
+            def monthly_rows(metric):
+                return self.slice_current_month_bundle(
+                    bundle, metric, 'month_current', 'month_previous', 'current_mo', 'previous_mo'
+                )
+
+            def daily_rows(metric):
+                return self.slice_current_month_bundle(
+                    bundle, metric, 'today', 'yesterday', 'today', 'yesterday'
+                )
+
             # Monthly Income section 
-            comparison_data = self.get_monthly_comparison_data(
-                current_date.replace(day=1),
-                (current_date.replace(day=1) - timedelta(days=1)).replace(day=1)
-            )
-            
+            comparison_data = monthly_rows(INCOME_METRIC)
             if not comparison_data.empty:
+                comparison_data = self.build_monthly_income_table(comparison_data)
                 st.subheader("Monthly Income Comparison")
                 monthly_chart = self.create_current_month_chart(comparison_data)
                 st.plotly_chart(monthly_chart, use_container_width=True)
-                display_comparison_table(comparison_data, 'monthly', "No monthly data available")
+                display_comparison_table(comparison_data, "No monthly data available")
 
             # Income Today section
             st.markdown("---")
             st.subheader("Income Today")
-            income_today = self.get_income_today_comparison()
-            display_comparison_table(income_today, 'income_today', "No data for today")
-            
-            # Admin data sections
-            st.markdown("---")
-            
-            # Visitors section
-            st.subheader("Monthly Visitors Comparison")
-            visitors_data = self.get_admin_monthly_comparison_data(
-                "Pengunjung", 
-                current_date.replace(day=1),
-                (current_date.replace(day=1) - timedelta(days=1)).replace(day=1)
+            income_today = self.slice_current_month_bundle(
+                bundle, INCOME_METRIC, 'today', 'same_day_last_month',
+                'current_mo', 'previous_mo', require_current=True
             )
-            display_comparison_table(visitors_data, 'admin_monthly', "No visitors data available")
-            
-            st.subheader("Visitors Today")
-            daily_visitors = self.get_daily_admin_comparison_data("Pengunjung")
-            display_comparison_table(daily_visitors, 'daily_admin', "No visitors data for today")
-            
-            st.markdown("---")
-            
-            # Orders section
-            st.subheader("Monthly Orders Comparison")
-            orders_data = self.get_admin_monthly_comparison_data(
-                "Pesanan",
-                current_date.replace(day=1),
-                (current_date.replace(day=1) - timedelta(days=1)).replace(day=1)
-            )
-            display_comparison_table(orders_data, 'admin_monthly', "No orders data available")
-            
-            st.subheader("Orders Today")
-            daily_orders = self.get_daily_admin_comparison_data("Pesanan")
-            display_comparison_table(daily_orders, 'daily_admin', "No orders data for today")
+            if not income_today.empty:
+                income_today = self.build_income_today_table(income_today)
+            display_comparison_table(income_today, "No data for today")
             
-            st.markdown("---")
-            
-            # Sales section
-            st.subheader("Monthly Sales Comparison")
-            sales_data = self.get_admin_monthly_comparison_data(
-                "Penjualan",
-                current_date.replace(day=1),
-                (current_date.replace(day=1) - timedelta(days=1)).replace(day=1)
-            )
-            display_comparison_table(sales_data, 'admin_monthly', "No sales data available")
-            
-            st.subheader("Sales Today")
-            daily_sales = self.get_daily_admin_comparison_data("Penjualan")
-            display_comparison_table(daily_sales, 'daily_admin', "No sales data for today")
+            # Admin data sections
+            for data_type, label in [("Pengunjung", "Visitors"), ("Pesanan", "Orders"),
+                                     ("Penjualan", "Sales")]:
+                st.markdown("---")
+
+                st.subheader(f"Monthly {label} Comparison")
+                monthly_data = monthly_rows(data_type)
+                if not monthly_data.empty:
+                    monthly_data = self.build_admin_monthly_table(monthly_data, data_type)
+                display_comparison_table(monthly_data, f"No {label.lower()} data available")
+
+                st.subheader(f"{label} Today")
+                daily_data = daily_rows(data_type)
+                if not daily_data.empty:
+                    daily_data = self.build_daily_admin_table(daily_data, data_type)
+                display_comparison_table(daily_data, f"No {label.lower()} data for today")
                 
         except Exception as e:
             st.error(f"Error generating current month report: {str(e)}")
             st.error(traceback.format_exc())
 
-    def create_pdf_table(self, df):
+    def create_pdf_table(self, frame):
         """Create formatted table for PDF with totals row"""
         try:
-            # Create totals dictionary
-            totals_dict = {}
-            for column in df.columns:
-                if column == df.columns[0]:  # First column (usually 'Accounts')
-                    totals_dict[column] = 'Total'
-                elif 'Rp' in str(df[column].iloc[0]):  # Currency columns
-                    value = df[column].str.replace('Rp', '').str.replace(',', '').astype(float).sum()
-                    totals_dict[column] = f"Rp{value:,.0f}"
-                elif '%' in str(df[column].iloc[0]):  # Percentage columns
-                    totals_dict[column] = ''
-                else:
-                    totals_dict[column] = ''
-            
-            # Create totals row DataFrame
-            totals_df = pd.DataFrame([totals_dict])
-            
-            # Combine data with totals
-            df_with_totals = pd.concat([df, totals_df], ignore_index=True)
-            
-            # Convert DataFrame to list of lists
-            data = [df_with_totals.columns.tolist()] + df_with_totals.values.tolist()
+            # Header, rows and totals row as text
+            data = frame.with_total().rows()
             
             # Create table
             table = Table(data)
@@ -1629,11 +950,20 @@ class ReportGenerator:
             selected_date = datetime(year, month, 1).date()
             prev_date = (selected_date - timedelta(days=1)).replace(day=1)
             
-            # Income comparison
+            # Income against the previous month and the same month last year, in one query
             st.subheader(f"{calendar.month_name[month]} Income Report")
-            monthly_table = self.create_monthly_comparison_table(year, month)
+            month_over_month = month_comparison(selected_date, prev_date, self.today())
+            year_over_year = month_comparison(selected_date, shift_months(selected_date, -12), self.today())
+            monthly_table, yearly_table = self.get_period_comparisons(
+                INCOME_METRIC, [month_over_month, year_over_year]
+            )
             if not monthly_table.empty:
-                st.dataframe(monthly_table, use_container_width=True)
+                st.dataframe(monthly_table.formatted(), use_container_width=True)
+            else:
+                st.info(f"No data available for {calendar.month_name[month]} {year}")
+            if not yearly_table.empty:
+                st.caption(f"Against {year_over_year[1].label}")
+                st.dataframe(yearly_table.formatted(), use_container_width=True)
             
             st.markdown("---")
             
@@ -1645,7 +975,7 @@ class ReportGenerator:
                 prev_date
             )
             if not visitors_data.empty:
-                st.dataframe(visitors_data, hide_index=True, use_container_width=True)
+                st.dataframe(visitors_data.formatted(), hide_index=True, use_container_width=True)
             
             st.markdown("---")
             
@@ -1657,7 +987,7 @@ class ReportGenerator:
                 prev_date
             )
             if not orders_data.empty:
-                st.dataframe(orders_data, hide_index=True, use_container_width=True)
+                st.dataframe(orders_data.formatted(), hide_index=True, use_container_width=True)
             
             st.markdown("---")
             
@@ -1669,7 +999,7 @@ class ReportGenerator:
                 prev_date
             )
             if not sales_data.empty:
-                st.dataframe(sales_data, hide_index=True, use_container_width=True)
+                st.dataframe(sales_data.formatted(), hide_index=True, use_container_width=True)
             
             # Generate PDF button
             #st.markdown("---")
@@ -1695,18 +1025,20 @@ class ReportGenerator:
 
     def get_all_monthly_data(self, year):
         """Get all monthly data for the year"""
+        period = Period.year(year)
         try:
             with get_db_cursor() as cur:
-                cur.execute("""
+                cur.execute(f"""
                     SELECT 
-                        date_trunc('month', date) as month,
-                        SUM(net_income) as net_income
-                    FROM income_data
+                        month::timestamp as month,
+                        SUM(total) as net_income
+                    FROM report_monthly_rollup
                     WHERE username = %s
-                    AND EXTRACT(YEAR FROM date) = %s
-                    GROUP BY date_trunc('month', date)
+                    AND metric = %s
+                    AND {period_predicate('month')}
+                    GROUP BY month
                     ORDER BY month
-                """, (st.session_state.username, year))
+                """, (st.session_state.username, INCOME_METRIC, *period.params()))
                 return pd.DataFrame(cur.fetchall())
         except Exception as e:
             st.error(f"Error fetching monthly data: {str(e)}")
@@ -1740,29 +1072,27 @@ class ReportGenerator:
         # Extract current and previous month columns
         current_month_col = comparison_data.columns[1]  # The current month column
         prev_month_col = comparison_data.columns[2]     # The previous month column
+        df = comparison_data.df
+        labels = comparison_data.formatted()
         
         fig = go.Figure()
         
         # Add current month bars
         fig.add_trace(go.Bar(
-            y=comparison_data['Accounts'],  # Changed to y for horizontal
-            x=comparison_data[current_month_col].apply(
-                lambda x: float(x.replace('Rp', '').replace(',', ''))
-            ),
+            y=df['Accounts'],  # Changed to y for horizontal
+            x=df[current_month_col],
             name=current_month_col,
-            text=comparison_data[current_month_col],
+            text=labels[current_month_col],
             textposition='auto',
             orientation='h'  # Make bars horizontal
         ))
         
         # Add previous month bars
         fig.add_trace(go.Bar(
-            y=comparison_data['Accounts'],  # Changed to y for horizontal
-            x=comparison_data[prev_month_col].apply(
-                lambda x: float(x.replace('Rp', '').replace(',', ''))
-            ),
+            y=df['Accounts'],  # Changed to y for horizontal
+            x=df[prev_month_col],
             name=prev_month_col,
-            text=comparison_data[prev_month_col],
+            text=labels[prev_month_col],
             textposition='auto',
             opacity=0.7,
             orientation='h'  # Make bars horizontal
@@ -1782,102 +1112,20 @@ class ReportGenerator:
 
     def create_monthly_comparison_table(self, year, month):
         """Create monthly comparison table with safe calculations"""
+        selected = Period.month(year, month)
+        previous = selected.previous()
         try:
-            # Calculate previous month
-            if month == 1:
-                prev_month = 12
-                prev_year = year - 1
-            else:
-                prev_month = month - 1
-                prev_year = year
-
-            with get_db_cursor() as cur:
-                # First check if data exists
-                cur.execute("""
-                    SELECT EXISTS (
-                        SELECT 1
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(MONTH FROM date) = %s
-                    )
-                """, (st.session_state.username, year, month))
-                
-                has_data = cur.fetchone()['exists']
-                
-                if not has_data:
-                    st.info(f"No data available for {calendar.month_name[month]} {year}")
-                    return pd.DataFrame()
-
-                # If data exists, proceed with comparison
-                cur.execute("""
-                    WITH selected_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as selected_month_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(MONTH FROM date) = %s
-                        GROUP BY store_account_id
-                    ),
-                    prev_month_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as prev_month_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(MONTH FROM date) = %s
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(s.store_account_id, p.store_account_id) as "Accounts",
-                        COALESCE(s.selected_month_income, 0) as selected_month_income,
-                        COALESCE(p.prev_month_income, 0) as prev_month_income
-                    FROM selected_month_data s
-                    FULL OUTER JOIN prev_month_data p ON s.store_account_id = p.store_account_id
-                    WHERE COALESCE(s.selected_month_income, 0) != 0 
-                       OR COALESCE(p.prev_month_income, 0) != 0
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, year, month,
-                     st.session_state.username, prev_year, prev_month))
-                
-                result = cur.fetchall()
-                if not result:
-                    return pd.DataFrame()
-                    
-                df = pd.DataFrame(result)
-                
-                # Calculate differences safely
-                df['Difference Rp'] = df['selected_month_income'] - df['prev_month_income']
-                
-                # Safe percentage calculation
-                df['Difference %'] = df.apply(lambda row: 
-                    0 if row['prev_month_income'] == 0
-                    else (row['Difference Rp'] / row['prev_month_income'] * 100)
-                    if row['prev_month_income'] != 0 else 0, axis=1)
-                
-                # Rename columns with month names
-                df = df.rename(columns={
-                    'selected_month_income': calendar.month_name[month],
-                    'prev_month_income': calendar.month_name[prev_month]
-                })
-                
-                # Format currency columns
-                currency_cols = [calendar.month_name[month], 
-                               calendar.month_name[prev_month], 
-                               'Difference Rp']
-                for col in currency_cols:
-                    df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-                
-                return df
-                
+            frame = compare_periods(
+                st.session_state.username, INCOME_METRIC, selected, previous,
+                calendar.month_name[month], calendar.month_name[previous.start.month],
+                drop_zero=True, difference='Difference Rp'
+            )
         except Exception as e:
+            frame = ReportFrame.empty_frame()
+        if frame.empty:
             st.info(f"No data available for {calendar.month_name[month]} {year}")
-            return pd.DataFrame()
-    
+        return frame
+
     def save_chart_for_pdf(self, fig):
         """Save plotly figure as bytes for PDF with optimized settings"""
         try:
@@ -1921,102 +1169,6 @@ class ReportGenerator:
             st.error(f"Error converting chart: {str(e)}")
             return None
     
-    def generate_current_month_pdf(self, comparison_data, monthly_chart,
-                                 visitors_data, orders_data, sales_data,
-                                 daily_visitors, daily_orders, daily_sales,
-                                 month_year):
-        """Generate PDF for current month report including all data"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=20,
-            leftMargin=20,
-            topMargin=30,
-            bottomMargin=30
-        )
-        
-        # Calculate available width
-        available_width = doc.width + doc.rightMargin + doc.leftMargin
-        
-        story = []
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontName='Helvetica-Bold',
-            fontSize=16,
-            spaceAfter=30
-        )
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontName='Helvetica-Bold',
-            fontSize=14,
-            spaceAfter=20
-        )
-        
-        # Title
-        story.append(Paragraph(f"Current Month Report - {month_year}", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Income section
-        if monthly_chart is not None:
-            story.append(Paragraph("Monthly Income Comparison", subtitle_style))
-            chart_buffer = self.save_chart_for_pdf(monthly_chart)
-            if chart_buffer:
-                story.append(Image(chart_buffer, width=available_width, height=300))
-        
-            if comparison_data is not None and not comparison_data.empty:
-                story.append(Spacer(1, 20))
-                income_table = self.create_pdf_table(comparison_data)
-                story.append(income_table)
-        
-        story.append(Spacer(1, 30))
-        
-        # Visitors section
-        if visitors_data is not None and not visitors_data.empty:
-            story.append(Paragraph("Monthly Visitors Comparison", subtitle_style))
-            visitors_table = self.create_pdf_table(visitors_data)
-            story.append(visitors_table)
-            story.append(Spacer(1, 20))
-            
-            if daily_visitors is not None and not daily_visitors.empty:
-                story.append(Paragraph("Visitors Today", subtitle_style))
-                daily_visitors_table = self.create_pdf_table(daily_visitors)
-                story.append(daily_visitors_table)
-                story.append(Spacer(1, 30))
-        
-        # Orders section
-        if orders_data is not None and not orders_data.empty:
-            story.append(Paragraph("Monthly Orders Comparison", subtitle_style))
-            orders_table = self.create_pdf_table(orders_data)
-            story.append(orders_table)
-            story.append(Spacer(1, 20))
-            
-            if daily_orders is not None and not daily_orders.empty:
-                story.append(Paragraph("Orders Today", subtitle_style))
-                daily_orders_table = self.create_pdf_table(daily_orders)
-                story.append(daily_orders_table)
-                story.append(Spacer(1, 30))
-        
-        # Sales section
-        if sales_data is not None and not sales_data.empty:
-            story.append(Paragraph("Monthly Sales Comparison", subtitle_style))
-            sales_table = self.create_pdf_table(sales_data)
-            story.append(sales_table)
-            story.append(Spacer(1, 20))
-            
-            if daily_sales is not None and not daily_sales.empty:
-                story.append(Paragraph("Sales Today", subtitle_style))
-                daily_sales_table = self.create_pdf_table(daily_sales)
-                story.append(daily_sales_table)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
-
     def generate_current_month_pdf(self, comparison_data, monthly_chart,
                                  visitors_data, orders_data, sales_data,
                                  daily_visitors, daily_orders, daily_sales,
@@ -2134,7 +1286,7 @@ class ReportGenerator:
             if comparison_data is not None and not comparison_data.empty:
                 story.append(Spacer(1, 15))  # Adjust spacing: 10-20 points
                 story.append(Paragraph("Income Details", subsection_style))
-                income_table = Table(comparison_data.values.tolist(), 
+                income_table = Table(comparison_data.with_total().rows(), 
                                    repeatRows=1,  # Repeat header row on new pages
                                    colWidths=[available_width/len(comparison_data.columns)]*len(comparison_data.columns))
                 income_table.setStyle(table_style)
@@ -2145,7 +1297,7 @@ class ReportGenerator:
         # Visitors section
         if visitors_data is not None and not visitors_data.empty:
             story.append(Paragraph("Monthly Visitors Comparison", section_style))
-            visitors_table = Table(visitors_data.values.tolist(),
+            visitors_table = Table(visitors_data.with_total().rows(),
                                  repeatRows=1,
                                  colWidths=[available_width/len(visitors_data.columns)]*len(visitors_data.columns))
             visitors_table.setStyle(table_style)
@@ -2154,7 +1306,7 @@ class ReportGenerator:
             
             if daily_visitors is not None and not daily_visitors.empty:
                 story.append(Paragraph("Visitors Today", subsection_style))
-                daily_visitors_table = Table(daily_visitors.values.tolist(),
+                daily_visitors_table = Table(daily_visitors.with_total().rows(),
                                           repeatRows=1,
                                           colWidths=[available_width/len(daily_visitors.columns)]*len(daily_visitors.columns))
                 daily_visitors_table.setStyle(table_style)
@@ -2164,7 +1316,7 @@ class ReportGenerator:
         # Orders section
         if orders_data is not None and not orders_data.empty:
             story.append(Paragraph("Monthly Orders Comparison", section_style))
-            orders_table = Table(orders_data.values.tolist(),
+            orders_table = Table(orders_data.with_total().rows(),
                                repeatRows=1,
                                colWidths=[available_width/len(orders_data.columns)]*len(orders_data.columns))
             orders_table.setStyle(table_style)
@@ -2173,7 +1325,7 @@ class ReportGenerator:
             
             if daily_orders is not None and not daily_orders.empty:
                 story.append(Paragraph("Orders Today", subsection_style))
-                daily_orders_table = Table(daily_orders.values.tolist(),
+                daily_orders_table = Table(daily_orders.with_total().rows(),
                                         repeatRows=1,
                                         colWidths=[available_width/len(daily_orders.columns)]*len(daily_orders.columns))
                 daily_orders_table.setStyle(table_style)
@@ -2183,7 +1335,7 @@ class ReportGenerator:
         # Sales section
         if sales_data is not None and not sales_data.empty:
             story.append(Paragraph("Monthly Sales Comparison", section_style))
-            sales_table = Table(sales_data.values.tolist(),
+            sales_table = Table(sales_data.with_total().rows(),
                               repeatRows=1,
                               colWidths=[available_width/len(sales_data.columns)]*len(sales_data.columns))
             sales_table.setStyle(table_style)
@@ -2192,7 +1344,7 @@ class ReportGenerator:
             
             if daily_sales is not None and not daily_sales.empty:
                 story.append(Paragraph("Sales Today", subsection_style))
-                daily_sales_table = Table(daily_sales.values.tolist(),
+                daily_sales_table = Table(daily_sales.with_total().rows(),
                                        repeatRows=1,
                                        colWidths=[available_width/len(daily_sales.columns)]*len(daily_sales.columns))
                 daily_sales_table.setStyle(table_style)
@@ -2219,15 +1371,14 @@ class ReportGenerator:
             # Create and display quarterly comparison table
             st.subheader(f"Q{quarter} Income Report")
             quarterly_table = self.create_quarterly_comparison_table(year, quarter)
-            st.dataframe(quarterly_table, use_container_width=True)
-            
+            st.dataframe(self.format_with_total(quarterly_table), use_container_width=True)
             
             # Generate PDF button
             #if st.button("Generate PDF Report"):
             #    pdf = self.generate_quarterly_pdf(
             #        quarterly_data,
             #        quarterly_table,
-            #       fig,
+            #        fig,
             #        year,
             #        quarter
             #    )
@@ -2235,40 +1386,32 @@ class ReportGenerator:
             #        "Download PDF",
             #        data=pdf,
             #        file_name=f"quarterly_report_{year}_Q{quarter}.pdf",
-            #        mime="application/pdf"
-            #    )
+            #       mime="application/pdf"
+            #   )
                 
         except Exception as e:
             st.error(f"Error generating quarterly report: {str(e)}")
 
     def get_all_quarterly_data(self, year):
         """Get all quarterly data for the year"""
+        # The current year only shows quarters up to the one last month fell in
+        period = Period.year(year)
+        last_month = shift_months(self.today(), -1)
+        if last_month.year == year:
+            period = Period(period.start, Period.quarter(year, quarter_of(last_month)).end)
         try:
             with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH quarterly_data AS (
-                        SELECT 
-                            date,
-                            net_income,
-                            EXTRACT(QUARTER FROM date) as quarter
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                    )
+                cur.execute(f"""
                     SELECT 
-                        quarter,
-                        SUM(net_income) as net_income
-                    FROM quarterly_data
-                    WHERE quarter <= (
-                        CASE 
-                            WHEN EXTRACT(YEAR FROM CURRENT_DATE) = %s 
-                            THEN EXTRACT(QUARTER FROM CURRENT_DATE - INTERVAL '1 month')
-                            ELSE 4 
-                        END
-                    )
+                        EXTRACT(QUARTER FROM month) as quarter,
+                        SUM(total) as net_income
+                    FROM report_monthly_rollup
+                    WHERE username = %s
+                    AND metric = %s
+                    AND {period_predicate('month')}
                     GROUP BY quarter
                     ORDER BY quarter
-                """, (st.session_state.username, year, year))
+                """, (st.session_state.username, INCOME_METRIC, *period.params()))
                 return pd.DataFrame(cur.fetchall())
         except Exception as e:
             st.error(f"Error fetching quarterly data: {str(e)}")
@@ -2297,88 +1440,15 @@ class ReportGenerator:
 
     def create_quarterly_comparison_table(self, year, selected_quarter):
         """Create quarterly comparison table"""
+        selected = Period.quarter(year, selected_quarter)
         try:
-            # Calculate previous quarter
-            if selected_quarter == 1:
-                prev_quarter = 4
-                prev_year = year - 1
-            else:
-                prev_quarter = selected_quarter - 1
-                prev_year = year
-
-            with get_db_cursor() as cur:
-                # Get data for selected quarter and previous quarter
-                cur.execute("""
-                    WITH selected_quarter_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as selected_quarter_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(QUARTER FROM date) = %s
-                        GROUP BY store_account_id
-                    ),
-                    prev_quarter_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as prev_quarter_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(QUARTER FROM date) = %s
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(s.store_account_id, p.store_account_id) as "Accounts",
-                        COALESCE(s.selected_quarter_income, 0) as selected_quarter_income,
-                        COALESCE(p.prev_quarter_income, 0) as prev_quarter_income
-                    FROM selected_quarter_data s
-                    FULL OUTER JOIN prev_quarter_data p ON s.store_account_id = p.store_account_id
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, year, selected_quarter,
-                     st.session_state.username, prev_year, prev_quarter))
-                
-                result = cur.fetchall()
-                if result:
-                    df = pd.DataFrame(result)
-                    
-                    # Calculate differences
-                    df['Difference Rp'] = df['selected_quarter_income'] - df['prev_quarter_income']
-                    df['Difference %'] = (df['Difference Rp'] / df['prev_quarter_income'] * 100).round(2)
-                    
-                    # Add total row
-                    total_row = pd.DataFrame({
-                        'Accounts': ['Total'],
-                        'selected_quarter_income': [df['selected_quarter_income'].sum()],
-                        'prev_quarter_income': [df['prev_quarter_income'].sum()],
-                        'Difference Rp': [df['Difference Rp'].sum()],
-                        'Difference %': [(df['selected_quarter_income'].sum() - df['prev_quarter_income'].sum()) / 
-                                       df['prev_quarter_income'].sum() * 100]
-                    })
-                    
-                    df = pd.concat([df, total_row])
-                    
-                    # Rename columns with quarter names
-                    df = df.rename(columns={
-                        'selected_quarter_income': f'Q{selected_quarter} {year}',
-                        'prev_quarter_income': f'Q{prev_quarter} {prev_year}'
-                    })
-                    
-                    # Format currency columns
-                    currency_cols = [f'Q{selected_quarter} {year}', 
-                                   f'Q{prev_quarter} {prev_year}', 
-                                   'Difference Rp']
-                    for col in currency_cols:
-                        df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                    df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-                    
-                    return df
-                return pd.DataFrame()
-                
+            return compare_periods(
+                st.session_state.username, INCOME_METRIC, selected, selected.previous(),
+                difference='Difference Rp'
+            )
         except Exception as e:
             st.error(f"Error creating quarterly comparison table: {str(e)}")
-            return pd.DataFrame()
+            return ReportFrame.empty_frame()
 
     def generate_quarterly_pdf(self, quarterly_data, quarterly_table, fig, year, quarter):
         """Generate PDF for quarterly report"""
@@ -2432,232 +1502,44 @@ class ReportGenerator:
         doc.build(story)
         buffer.seek(0)
         return buffer.getvalue()
-    
-    def generate_quarterly_report(self, year, quarter):
-        """Generate quarterly report"""
+
+    def generate_yearly_report(self, year):
+        """Generate yearly report"""
         try:
-            # Get quarterly data
-            quarterly_data = self.get_all_quarterly_data(year)
-            if quarterly_data.empty:
+            # Month by month income of the year
+            monthly_data = self.get_all_monthly_data(year)
+            if monthly_data.empty:
                 st.warning("No data available for selected period.")
                 return
             
-            # Create and display bar chart
-            fig = self.create_quarterly_bar_chart(quarterly_data)
+            fig = self.create_monthly_bar_chart(monthly_data)
+            fig.update_layout(title=f"{year} Report")
             st.plotly_chart(fig, use_container_width=True)
             
-            # Create and display quarterly comparison table
-            st.subheader(f"Q{quarter} Income Report")
-            quarterly_table = self.create_quarterly_comparison_table(year, quarter)
-            st.dataframe(quarterly_table, use_container_width=True)
-            
-            # Generate PDF button
-            #if st.button("Generate PDF Report"):
-            #    pdf = self.generate_quarterly_pdf(
-            #        quarterly_data,
-            #        quarterly_table,
-            #        fig,
-            #        year,
-            #        quarter
-            #    )
-            #    st.download_button(
-            #        "Download PDF",
-            #        data=pdf,
-            #        file_name=f"quarterly_report_{year}_Q{quarter}.pdf",
-            #       mime="application/pdf"
-            #   )
+            # Year against previous year, per store account
+            for metric, title in [(INCOME_METRIC, "Income"),
+                                  ("Pengunjung", "Visitors"),
+                                  ("Pesanan", "Orders"),
+                                  ("Penjualan", "Sales")]:
+                st.subheader(f"{year} {title} Report")
+                yearly_table = self.create_yearly_comparison_table(year, metric)
+                if not yearly_table.empty:
+                    st.dataframe(yearly_table.formatted(), hide_index=True, use_container_width=True)
+                else:
+                    st.info(f"No {title.lower()} data available for {year}")
+                st.markdown("---")
                 
         except Exception as e:
-            st.error(f"Error generating quarterly report: {str(e)}")
+            st.error(f"Error generating yearly report: {str(e)}")
 
-    def get_all_quarterly_data(self, year):
-        """Get all quarterly data for the year"""
+    def create_yearly_comparison_table(self, year, metric=INCOME_METRIC):
+        """Create yearly comparison table for a rollup metric"""
+        selected = Period.year(year)
         try:
-            with get_db_cursor() as cur:
-                cur.execute("""
-                    WITH quarterly_data AS (
-                        SELECT 
-                            date,
-                            net_income,
-                            EXTRACT(QUARTER FROM date) as quarter
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                    )
-                    SELECT 
-                        quarter,
-                        SUM(net_income) as net_income
-                    FROM quarterly_data
-                    WHERE quarter <= (
-                        CASE 
-                            WHEN EXTRACT(YEAR FROM CURRENT_DATE) = %s 
-                            THEN EXTRACT(QUARTER FROM CURRENT_DATE - INTERVAL '1 month')
-                            ELSE 4 
-                        END
-                    )
-                    GROUP BY quarter
-                    ORDER BY quarter
-                """, (st.session_state.username, year, year))
-                return pd.DataFrame(cur.fetchall())
+            return compare_periods(
+                st.session_state.username, metric, selected, selected.previous()
+            )
         except Exception as e:
-            st.error(f"Error fetching quarterly data: {str(e)}")
-            return pd.DataFrame()
+            st.error(f"Error creating yearly comparison table: {str(e)}")
+            return ReportFrame.empty_frame()
 
-    def create_quarterly_bar_chart(self, quarterly_data):
-        """Create quarterly bar chart"""
-        fig = go.Figure()
-        
-        fig.add_trace(go.Bar(
-            x=[f'Q{int(q)}' for q in quarterly_data['quarter']],
-            y=quarterly_data['net_income'],
-            text=quarterly_data['net_income'].apply(lambda x: f'Rp{x:,.0f}'),
-            textposition='auto',
-        ))
-        
-        fig.update_layout(
-            title="Quarter Report",
-            xaxis_title="Quarter",
-            yaxis_title="Net Income (Rp)",
-            height=500,
-            showlegend=False
-        )
-        
-        return fig
-
-    def create_quarterly_comparison_table(self, year, selected_quarter):
-        """Create quarterly comparison table"""
-        try:
-            # Calculate previous quarter
-            if selected_quarter == 1:
-                prev_quarter = 4
-                prev_year = year - 1
-            else:
-                prev_quarter = selected_quarter - 1
-                prev_year = year
-
-            with get_db_cursor() as cur:
-                # Get data for selected quarter and previous quarter
-                cur.execute("""
-                    WITH selected_quarter_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as selected_quarter_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(QUARTER FROM date) = %s
-                        GROUP BY store_account_id
-                    ),
-                    prev_quarter_data AS (
-                        SELECT 
-                            store_account_id,
-                            SUM(net_income) as prev_quarter_income
-                        FROM income_data
-                        WHERE username = %s
-                        AND EXTRACT(YEAR FROM date) = %s
-                        AND EXTRACT(QUARTER FROM date) = %s
-                        GROUP BY store_account_id
-                    )
-                    SELECT 
-                        COALESCE(s.store_account_id, p.store_account_id) as "Accounts",
-                        COALESCE(s.selected_quarter_income, 0) as selected_quarter_income,
-                        COALESCE(p.prev_quarter_income, 0) as prev_quarter_income
-                    FROM selected_quarter_data s
-                    FULL OUTER JOIN prev_quarter_data p ON s.store_account_id = p.store_account_id
-                    ORDER BY "Accounts"
-                """, (st.session_state.username, year, selected_quarter,
-                     st.session_state.username, prev_year, prev_quarter))
-                
-                result = cur.fetchall()
-                if result:
-                    df = pd.DataFrame(result)
-                    
-                    # Calculate differences
-                    df['Difference Rp'] = df['selected_quarter_income'] - df['prev_quarter_income']
-                    df['Difference %'] = (df['Difference Rp'] / df['prev_quarter_income'] * 100).round(2)
-                    
-                    # Add total row
-                    total_row = pd.DataFrame({
-                        'Accounts': ['Total'],
-                        'selected_quarter_income': [df['selected_quarter_income'].sum()],
-                        'prev_quarter_income': [df['prev_quarter_income'].sum()],
-                        'Difference Rp': [df['Difference Rp'].sum()],
-                        'Difference %': [(df['selected_quarter_income'].sum() - df['prev_quarter_income'].sum()) / 
-                                       df['prev_quarter_income'].sum() * 100]
-                    })
-                    
-                    df = pd.concat([df, total_row])
-                    
-                    # Rename columns with quarter names
-                    df = df.rename(columns={
-                        'selected_quarter_income': f'Q{selected_quarter} {year}',
-                        'prev_quarter_income': f'Q{prev_quarter} {prev_year}'
-                    })
-                    
-                    # Format currency columns
-                    currency_cols = [f'Q{selected_quarter} {year}', 
-                                   f'Q{prev_quarter} {prev_year}', 
-                                   'Difference Rp']
-                    for col in currency_cols:
-                        df[col] = df[col].apply(lambda x: f"Rp{x:,.0f}")
-                    df['Difference %'] = df['Difference %'].apply(lambda x: f"{x:,.2f}%")
-                    
-                    return df
-                return pd.DataFrame()
-                
-        except Exception as e:
-            st.error(f"Error creating quarterly comparison table: {str(e)}")
-            return pd.DataFrame()
-
-    def generate_quarterly_pdf(self, quarterly_data, quarterly_table, fig, year, quarter):
-        """Generate PDF for quarterly report"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=30,
-            leftMargin=30,
-            topMargin=30,
-            bottomMargin=30
-        )
-        
-        # Prepare styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontName='Helvetica-Bold',
-            fontSize=16,
-            spaceAfter=30
-        )
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontName='Helvetica-Bold',
-            fontSize=14,
-            spaceAfter=20
-        )
-        
-        # Build story
-        story = []
-        
-        # Title
-        story.append(Paragraph(f"Quarterly Report - Q{quarter} {year}", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Chart
-        with tempfile.NamedTemporaryFile(suffix='.png') as tmp:
-            fig.write_image(tmp.name, width=700, height=400)
-            story.append(Image(tmp.name, width=500, height=300))
-        
-        story.append(Spacer(1, 20))
-        
-        # Quarterly comparison table
-        story.append(Paragraph(f"Q{quarter} Income Report", subtitle_style))
-        quarterly_comparison_table = self.create_pdf_table(quarterly_table)
-        story.append(quarterly_comparison_table)
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
@@ -0,0 +1,12 @@
+"""Daily and monthly rollups of income and admin input metrics.
+
+Statement-level triggers on income_data and imp_gs_admininput fold every
+insert, update and delete into report_daily_rollup and report_monthly_rollup
+inside the writing transaction, so saves and admin loads keep them current
+without any extra call. The same tables stamp report_data_version on every
+write, so report caches can tell when a user's data changed in the database.
+The tables and triggers are created by migrations 5 and 9 in migrations.py.
+"""
+
+# Metric name used for income_data rows; admin input rows use their type
+INCOME_METRIC = 'income'
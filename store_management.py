@@ -2,6 +2,7 @@ import streamlit as st
 from database import get_db_cursor
 import uuid
 from datetime import datetime
+from report_cache import invalidate_user
 from utils import generate_unique_id 
 
 class StoreManager:
@@ -85,6 +86,7 @@ class StoreManager:
                          store_name, account_name, store_create_date, 
                          store_account_id)
                     )
+                invalidate_user(st.session_state.username)
                 st.success("New account saved!")
             except Exception as e:
                 st.error(f"Error saving account: {str(e)}")
@@ -159,6 +161,18 @@ class StoreManager:
                                  selected_store_id, st.session_state.username)
                             )
 
+                            # Move the store's orders along with its days
+                            cur.execute(
+                                """
+                                UPDATE income_orders 
+                                SET store_account_id = %s
+                                WHERE store_account_id = %s 
+                                AND username = %s
+                                """,
+                                (self.generate_store_account_id(new_store_name, new_account_name),
+                                 selected_store_id, st.session_state.username)
+                            )
+
                             # Then update the ecom_store table
                             cur.execute(
                                 """
@@ -187,6 +201,7 @@ class StoreManager:
                                  self.generate_store_account_id(new_store_name, new_account_name))
                             )
 
+                        invalidate_user(st.session_state.username)
                         st.success("Changes saved!")
                         st.rerun()
 
@@ -257,6 +272,7 @@ class StoreManager:
                                 (selected_store_id, st.session_state.username)
                             )
 
+                        invalidate_user(st.session_state.username)
                         st.success("Store deleted successfully!")
                         st.rerun()
 
@@ -1,6 +1,6 @@
 import uuid
 import bcrypt
-from datetime import datetime
+from date_parsing import parse_date_string
 
 def generate_unique_id():
     """Generate a unique identifier"""
@@ -15,14 +15,12 @@ def check_password(password, hashed):
     """Check a password against its hash"""
     return bcrypt.checkpw(password.encode('utf-8'), hashed)
 
+# Accepted inputs of format_date
+FORMAT_DATE_INPUTS = ['%Y-%m-%d %H:%M:%S', '%Y/%m/%d']
+
 def format_date(date_str):
     """Format date string to mm/dd/yyyy"""
-    try:
-        date_obj = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-        return date_obj.strftime('%m/%d/%Y')
-    except ValueError:
-        try:
-            date_obj = datetime.strptime(date_str, '%Y/%m/%d')
-            return date_obj.strftime('%m/%d/%Y')
-        except ValueError:
-            return None
\ No newline at end of file
+    date_obj = parse_date_string(date_str, FORMAT_DATE_INPUTS)
+    if date_obj is None:
+        return None
+    return date_obj.strftime('%m/%d/%Y')